@@ -0,0 +1,74 @@
+'''Memory footprint of the peptide/protein model objects for one dataset.
+
+usage: python benchmarks/model_memory.py <result.tsv> <database.fasta>
+
+Reads the TSV, runs the PeptideMatch step and reports the number of model objects,
+their average shallow size (instance plus `__dict__`, if any) and the number of
+distinct string objects behind the sequence, dummy and UniProt attributes.
+'''
+from __future__ import annotations
+
+import gc
+import os
+import sys
+import tempfile
+import tracemalloc
+from collections import defaultdict
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'src'))
+
+from rdf_converter.models.dataset import DataSet
+from rdf_converter.models.peptide import Peptide
+from rdf_converter.models.project import Project
+from rdf_converter.models.protein import Protein
+
+
+def get_object_size(obj) -> int:
+    size = sys.getsizeof(obj)
+    if hasattr(obj, '__dict__'):
+        size += sys.getsizeof(obj.__dict__)
+    return size
+
+
+def main(tsv_path: str, fasta_path: str) -> None:
+    tracemalloc.start()
+    dataset = DataSet(Project('9999'), '1')
+    peptides = Peptide.read_peptides(dataset, tsv_path)
+    with tempfile.TemporaryDirectory() as work_dir:
+        result = Protein.get_protein_list(peptides, work_dir, fasta_path)
+    gc.collect()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    proteins = list({id(protein): protein for protein in result['proteins']}.values())
+    peptides = result['peptides']
+    matches = [match for protein in proteins for match in protein.get_peptide_matches()]
+
+    print(f'{"class":<14}{"count":>10}{"bytes/object":>14}')
+    for name, objects in [('Peptide', peptides), ('Protein', proteins), ('PeptideMatch', matches)]:
+        if len(objects) > 0:
+            average = sum(get_object_size(obj) for obj in objects) / len(objects)
+            print(f'{name:<14}{len(objects):>10}{average:>14.1f}')
+
+    strings = defaultdict(set)
+    for peptide in peptides:
+        strings['sequence'].add(id(peptide.get_sequence()))
+        strings['dummy'].add(id(peptide.get_dummy()))
+    for match in matches:
+        strings['hit_sequence'].add(id(match.get_hit_sequence()))
+    for protein in proteins:
+        strings['uniprot'].add(id(protein.get_uniprot()))
+    print()
+    for name, ids in strings.items():
+        print(f'distinct {name} objects: {len(ids)}')
+    print()
+    print(f'traced memory: current={current / 1024 / 1024:.1f} MiB, peak={peak / 1024 / 1024:.1f} MiB')
+
+
+if __name__ == '__main__':
+    if len(sys.argv) != 3:
+        print(__doc__)
+        sys.exit(1)
+    os.environ.setdefault('PEPTIDEMATCH_BACKEND', 'python')
+    main(sys.argv[1], sys.argv[2])
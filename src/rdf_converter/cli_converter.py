@@ -25,6 +25,22 @@ def dataset(
     conv = DatasetConverter(rev, branch, tsv, fasta, meta_data, pep, intermediate_dir, out, java_bin, peptidematch_jar)
     conv.convert()
 
+@app.command()
+def datasets(
+    dataset_list: str = typer.Option(..., '--list', help='TSV of datasets (tsv, fasta, meta_data, out, intermediate_dir, rev, branch, pep)'),
+):
+    load_dotenv()
+    peptidematch_jar = os.getenv('PEPTIDEMATCH_JAR')
+    java_bin = os.getenv('JAVA_BIN', 'java')
+
+    # all datasets run in this process, so a resident matcher is reused by datasets sharing a FASTA
+    for row in DatasetConverter.read_dataset_list(dataset_list):
+        conv = DatasetConverter(
+            row['rev'], row['branch'], row['tsv'], row['fasta'], row['meta_data'], row['pep'],
+            row['intermediate_dir'], row['out'], java_bin, peptidematch_jar
+        )
+        conv.convert()
+
 @app.command()
 def project(
     meta_data: str = typer.Option(..., '--meta-data', help='Metadata'),
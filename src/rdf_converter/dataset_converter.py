@@ -5,6 +5,7 @@ import psutil
 import datetime
 import logging
 from .utils.logging import get_logger
+from .models.metadata import MetadataDocument
 from .models.project import Project
 from .models.dataset import DataSet
 from .models.sample import Sample
@@ -16,11 +17,12 @@ from .models.peptide import Peptide
 from .models.protein import Protein
 from .models.isoform import Isoform
 from .models.group import Group 
-from .models.psm import Psm
-from .models.spectrum import Spectrum
+from .models.psm import Psm, PsmTable
 from .models.pep import Pep
 
+import csv
 import os
+import shutil
 
 logger = get_logger(__name__)
 
@@ -65,35 +67,69 @@ class DatasetConverter:
         return folder_path
     
 
+    @staticmethod
+    def read_dataset_list(list_path: str) -> list[dict[str, str | None]]:
+        '''Reads a TSV of datasets with the columns tsv, fasta, meta_data, out, intermediate_dir, rev, branch and pep (optional).'''
+        datasets = []
+        with open(list_path, 'r', encoding='utf-8') as f:
+            for row in csv.DictReader(f, delimiter='\t'):
+                row['pep'] = row.get('pep') or None
+                datasets.append(row)
+        return datasets
+
+
     def convert(self) -> None:
         work_dir = self.get_work_folder().resolve()
         logger.info(f'Working directory: {work_dir}')
 
-        project = Project.read_project(str(self.meta_path))
+        # ids restart for every dataset, so conversions sharing a process write the same ids as separate runs
+        Peptide.counter = 0
+        Psm.counter = 0
+
+        meta_reader = os.getenv('META_READER', 'tree')
+        metadata = MetadataDocument.read(str(self.meta_path), iterparse=(meta_reader == 'iterparse'))
+
+        project = Project.read_project(metadata)
         project.set_id(self.rev)
         dataset = DataSet(project, self.branch)
 
-        sample = Sample.read_sample(dataset, str(self.meta_path))
+        sample = Sample.read_sample(dataset, metadata)
         logger.info(f'{sample}')
 
-        fractionation = Fractionation.read_fractionation(dataset, str(self.meta_path))
+        fractionation = Fractionation.read_fractionation(dataset, metadata)
         logger.info(f'{fractionation}')
         
-        enzyme = Enzyme.read_enzyme(dataset, str(self.meta_path))
+        enzyme = Enzyme.read_enzyme(dataset, metadata)
         logger.info(f'{enzyme}')
 
-        ms_mode = MsMode.read_ms_mode(dataset, str(self.meta_path))
+        ms_mode = MsMode.read_ms_mode(dataset, metadata)
         logger.info(f'{ms_mode}')
 
-        raw_data_list = RawDataList.read_rawdata_list(dataset, str(self.meta_path))
+        raw_data_list = RawDataList.read_rawdata_list(dataset, metadata)
         logger.info(f'{raw_data_list}')
 
-        peptides = Peptide.read_peptides(dataset, str(self.tsv_path))        
+        batch_size = int(os.getenv('TSV_BATCH_SIZE', '10000'))
+        tsv_reader = os.getenv('TSV_READER', 'csv')
+        if tsv_reader == 'pandas':
+            batches = Peptide.iter_peptides_columnar(dataset, str(self.tsv_path), batch_size)
+        else:
+            batches = Peptide.iter_peptides(dataset, str(self.tsv_path), batch_size)
+
+        peptides = []
+        psms = PsmTable(dataset)
+        # spectrum triples do not depend on the peptide ids assigned after PeptideMatch,
+        # so they are written as batches arrive and copied into the TTL later
+        spectra_path = work_dir / 'spectra.ttl'
+        spectrum_count = 0
+        with open(spectra_path, 'w', encoding='utf-8') as spectra_file:
+            for batch in batches:
+                peptides.extend(batch)
+                for spectrum in Psm.collect_psms(batch):
+                    spectrum.to_ttl(spectra_file)
+                    spectrum_count += 1
         logger.info(f'Peptides: {len(peptides)}')
-
-        psms, spectra = Psm.get_psms(peptides)
         logger.info(f'PSMs: {len(psms)}')
-        logger.info(f'Spectra: {len(spectra)}')
+        logger.info(f'Spectra: {spectrum_count}')
 
         peps = None
         if self.pep_path:
@@ -105,11 +141,15 @@ class DatasetConverter:
         peptides = protein_pair['peptides']
         logger.info(f'Hit Proteins: {len(proteins)}, Hit Peptides: {len(peptides)}')
 
-        optimized_proteins = Protein.optimize(proteins)
+        optimization_stats = []
+        optimized_proteins = Protein.optimize(proteins, optimization_stats)
         optimization_file = work_dir / 'optimization.txt'
         with open(optimization_file, 'w') as f:
             for protein in optimized_proteins:
                 f.write(f'{protein.get_uniprot()}\n')
+        optimization_stats_file = work_dir / 'optimization_stats.tsv'
+        with open(optimization_stats_file, 'w') as f:
+            Protein.save_optimization_stats(f, optimization_stats)
         logger.info(f'Optimized Proteins: {len(optimized_proteins)}')
 
         proteins, isoforms = Protein.create_isoforms(proteins, optimized_proteins)
@@ -121,7 +161,7 @@ class DatasetConverter:
         Protein.check_proteins(proteins)
         Peptide.check_peptides(proteins, peptides)
 
-        self.write_ttl(self.ttl_path, project, dataset, peptides, proteins, optimized_proteins, isoforms, groups, psms, spectra, peps)
+        self.write_ttl(self.ttl_path, project, dataset, peptides, proteins, optimized_proteins, isoforms, groups, psms, spectra_path, spectrum_count, peps)
 
 
     def write_ttl(
@@ -134,8 +174,9 @@ class DatasetConverter:
             optimized_proteins: list[Protein],
             isoforms: list[Isoform],
             groups: list[Group],
-            psms: list[Psm],
-            spectra: list[Spectrum],
+            psms: PsmTable,
+            spectra_path: pathlib.Path,
+            spectrum_count: int,
             peps: list[Pep]
 
     ) -> None:
@@ -144,13 +185,10 @@ class DatasetConverter:
             project.to_ttl(f)
             dataset.to_ttl(f)
 
-            for spectrum in spectra:
-                spectrum.to_ttl(f)
+            with open(spectra_path, 'r', encoding='utf-8') as spectra_file:
+                shutil.copyfileobj(spectra_file, f)
 
-            all_not_found = []
-            for psm in psms:
-                not_found = psm.to_ttl(f)
-                all_not_found.extend(not_found)
+            all_not_found = psms.to_ttl(f)
 
             all_not_found.sort()
             all_not_found = list(dict.fromkeys(all_not_found))
@@ -169,7 +207,7 @@ class DatasetConverter:
             for isoform in isoforms:
                 isoform.to_ttl(f)
 
-            self.write_statistics(f, dataset, peptides, proteins, optimized_proteins, psms, spectra, peps)
+            self.write_statistics(f, dataset, peptides, proteins, optimized_proteins, psms, spectrum_count, peps)
 
             if peps is not None:
                 for pep in peps:
@@ -233,8 +271,8 @@ class DatasetConverter:
             peptides: list[Peptide],
             proteins: list[Protein],
             optimizaed_proteins: list[Protein],
-            psms: list[Psm],
-            spectra: list[Spectrum],
+            psms: PsmTable,
+            spectrum_count: int,
             peps: list[Pep]
     ) -> None:
         f.write(f':{dataset.get_id()} \n')
@@ -246,7 +284,7 @@ class DatasetConverter:
 
         f.write('    sio:SIO_000216 [\n')
         f.write('        a jpost:NumOfSpectra ;\n')
-        f.write(f'        sio:SIO_000300 {len(spectra)} ;\n')
+        f.write(f'        sio:SIO_000300 {spectrum_count} ;\n')
         f.write('        rdfs:label "Number of Spectra"\n')
         f.write('    ] ;\n')
 
@@ -12,6 +12,7 @@ if TYPE_CHECKING:
     from .enzyme import Enzyme
     from .msmode import MsMode
     from .rawdata_list import RawDataList
+    from .psm import PsmTable
 
 from ..utils.string_tool import is_not_empty    
 
@@ -27,6 +28,8 @@ class DataSet:
     enzyme: Enzyme | None = None
     ms_mode: MsMode | None = None
     rawdata_list: RawDataList | None = None
+    psm_table: PsmTable | None = None
+    dummy_ids: dict[str, int] = field(default_factory=dict)
 
     def __init__(self, project: Project, branch: str):
         self.project = project
@@ -34,6 +37,7 @@ class DataSet:
 
         self.number = f'{project.get_project_number()}_{branch}'
         self.id = f'DS{self.number}'
+        self.dummy_ids = {}
 
 
     def get_project(self) -> Project:
@@ -72,6 +76,15 @@ class DataSet:
     def set_rawdata_list(self, rawdata_list: RawDataList) -> None:
         self.rawdata_list = rawdata_list
 
+    def get_psm_table(self) -> PsmTable | None:
+        return self.psm_table
+    
+    def set_psm_table(self, psm_table: PsmTable) -> None:
+        self.psm_table = psm_table
+
+    def get_dummy_id(self, dummy: str) -> int:
+        return self.dummy_ids.setdefault(dummy, len(self.dummy_ids))
+
     def get_number(self) -> str | None:
         return self.number
     
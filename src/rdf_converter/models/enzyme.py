@@ -4,7 +4,7 @@ from __future__ import annotations
 from dataclasses import dataclass, field
 import logging
 
-import xml.etree.ElementTree as ET
+from .metadata import MetadataDocument
 
 from typing import TYPE_CHECKING
 
@@ -88,9 +88,8 @@ class Enzyme:
 
 
     @staticmethod
-    def read_enzyme(dataset: DataSet, meta_path: str) -> Enzyme:
-        tree = ET.parse(meta_path)
-        root = tree.getroot()
+    def read_enzyme(dataset: DataSet, meta_path: str | MetadataDocument) -> Enzyme:
+        root = MetadataDocument.get_document(meta_path).get_root()
 
         enzyme = Enzyme(dataset)
 
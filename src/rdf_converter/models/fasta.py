@@ -3,6 +3,10 @@ from __future__ import annotations
 from dataclasses import dataclass, field
 from ..utils.string_tool import is_not_empty
 import logging
+import mmap
+import os
+from pathlib import Path
+from typing import Callable
 
 from typing import TYPE_CHECKING
 
@@ -50,3 +54,152 @@ class Fasta:
                 fastas.append(fasta)
         return fastas
     
+
+@dataclass
+class FastaRecord:
+    accession: str
+    title: str
+    length: int
+    offset: int
+    end_offset: int
+    line_bases: int
+    line_bytes: int
+
+
+class FastaIndex:
+    INDEX_SUFFIX = '.rdfidx'
+
+    def __init__(self, fasta_path: str, records: dict[str, FastaRecord]):
+        self.fasta_path = fasta_path
+        self.records = records
+        self.file = open(fasta_path, 'rb')
+        self.mm = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ) if os.path.getsize(fasta_path) > 0 else b''
+
+    def close(self) -> None:
+        if isinstance(self.mm, mmap.mmap):
+            self.mm.close()
+        self.file.close()
+
+    def __enter__(self) -> FastaIndex:
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+    def __contains__(self, accession: str) -> bool:
+        return accession in self.records
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def get_record(self, accession: str) -> FastaRecord | None:
+        return self.records.get(accession)
+
+    def get_sequence(self, accession: str, start: int | None = None, end: int | None = None) -> str | None:
+        record = self.records.get(accession)
+        if record is None:
+            return None
+
+        first = 0 if start is None else max(start - 1, 0)
+        last = record.length if end is None else min(end, record.length)
+        if first >= last:
+            return ''
+
+        if record.line_bases > 0:
+            begin = record.offset + (first // record.line_bases) * record.line_bytes + first % record.line_bases
+            finish = record.offset + ((last - 1) // record.line_bases) * record.line_bytes + (last - 1) % record.line_bases + 1
+            data = self.mm[begin:finish]
+            return data.translate(None, b' \t\r\n').decode('ascii')
+
+        data = self.mm[record.offset:record.end_offset]
+        sequence = b''.join(line.strip() for line in data.splitlines()).decode('ascii')
+        return sequence[first:last]
+
+    @staticmethod
+    def open(fasta_path: str, extract_accession: Callable[[str], str]) -> FastaIndex:
+        index_path = Path(f'{fasta_path}{FastaIndex.INDEX_SUFFIX}')
+        records = None
+        if index_path.exists() and index_path.stat().st_mtime >= Path(fasta_path).stat().st_mtime:
+            records = FastaIndex.read_index(index_path)
+
+        if records is None:
+            records = FastaIndex.build_index(fasta_path, extract_accession)
+            try:
+                FastaIndex.write_index(index_path, records)
+            except OSError as e:
+                logger.warning(f'Could not save FASTA index {index_path}: {e}')
+
+        return FastaIndex(fasta_path, records)
+
+    @staticmethod
+    def build_index(fasta_path: str, extract_accession: Callable[[str], str]) -> dict[str, FastaRecord]:
+        records = {}
+        with open(fasta_path, 'rb') as fr:
+            title = None
+            offset = 0
+            position = 0
+            length = 0
+            line_bases = 0
+            line_bytes = 0
+            regular = True
+            last_short = False
+
+            def add_record() -> None:
+                if title is not None and length > 0:
+                    accession = extract_accession(title)
+                    records[accession] = FastaRecord(
+                        accession, title, length, offset, position,
+                        line_bases if regular else 0, line_bytes if regular else 0
+                    )
+
+            for line in fr:
+                if line.startswith(b'>'):
+                    add_record()
+                    title = line[1:].decode('utf-8').strip()
+                    offset = position + len(line)
+                    length = 0
+                    line_bases = 0
+                    line_bytes = 0
+                    regular = True
+                    last_short = False
+                else:
+                    bases = len(line.strip())
+                    if bases > 0:
+                        if line_bases == 0:
+                            line_bases = bases
+                            line_bytes = len(line)
+                        elif last_short or bases > line_bases or (bases == line_bases and len(line) != line_bytes):
+                            regular = False
+                        if line[:1].isspace():
+                            regular = False
+                        elif bases < line_bases:
+                            last_short = True
+                        length += bases
+                    elif length > 0:
+                        last_short = True
+                position += len(line)
+            add_record()
+        return records
+
+    @staticmethod
+    def read_index(index_path: Path) -> dict[str, FastaRecord] | None:
+        records = {}
+        try:
+            with open(index_path, 'r', encoding='utf-8') as fr:
+                for line in fr:
+                    parts = line.rstrip('\n').split('\t')
+                    record = FastaRecord(parts[0], parts[6], int(parts[1]), int(parts[2]), int(parts[3]), int(parts[4]), int(parts[5]))
+                    records[record.accession] = record
+        except (OSError, ValueError, IndexError) as e:
+            logger.warning(f'Could not read FASTA index {index_path}: {e}')
+            return None
+        return records
+
+    @staticmethod
+    def write_index(index_path: Path, records: dict[str, FastaRecord]) -> None:
+        tmp_path = index_path.with_name(f'{index_path.name}.{os.getpid()}.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as fw:
+            for record in records.values():
+                row = [record.accession, record.length, record.offset, record.end_offset, record.line_bases, record.line_bytes, record.title]
+                fw.write('\t'.join(str(col) for col in row) + '\n')
+        os.replace(tmp_path, index_path)
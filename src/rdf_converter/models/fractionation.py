@@ -3,7 +3,7 @@ from __future__ import annotations
 from dataclasses import dataclass, field
 from ..utils.string_tool import is_not_empty
 import logging
-import xml.etree.ElementTree as ET
+from .metadata import MetadataDocument
 
 from typing import TYPE_CHECKING
 
@@ -218,9 +218,8 @@ class Fractionation:
 
 
     @staticmethod
-    def read_fractionation(dataset: DataSet, xml_file: str) -> Fractionation:
-        tree = ET.parse(xml_file)
-        root = tree.getroot()
+    def read_fractionation(dataset: DataSet, xml_file: str | MetadataDocument) -> Fractionation:
+        root = MetadataDocument.get_document(xml_file).get_root()
 
         fractionation = Fractionation(dataset)
 
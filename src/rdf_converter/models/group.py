@@ -1,6 +1,7 @@
 
 from __future__ import annotations
 
+from collections import defaultdict
 from dataclasses import dataclass, field
 
 from typing import TYPE_CHECKING
@@ -9,16 +10,20 @@ if TYPE_CHECKING:
     from .peptide import Peptide
     from .dataset import DataSet
 
-@dataclass
+@dataclass(slots=True)
 class Group:
     id: str | None = None
     proteins: list[Protein] = field(default_factory=list)
     peptides: list[Peptide] = field(default_factory=list)
+    protein_ids: set[str] = field(default_factory=set)
+    peptide_dummies: set[str] = field(default_factory=set)
 
     def __init__(self, id):
         self.id = id
         self.proteins = []
         self.peptides = []
+        self.protein_ids = set()
+        self.peptide_dummies = set()
 
     def get_id(self) -> str | None:
         return self.id
@@ -30,22 +35,14 @@ class Group:
         return self.peptides
     
     def add_protein(self, protein: Protein) -> None:
-        found = False
-        for p in self.proteins:
-            if p.get_id() == protein.get_id():
-                found = True
-
-        if not found:
+        if protein.get_id() not in self.protein_ids:
+            self.protein_ids.add(protein.get_id())
             self.proteins.append(protein)
 
 
     def add_peptide(self, peptide: Peptide) -> None:
-        found = False
-        for p in self.peptides:
-            if p.get_dummy() == peptide.get_dummy():
-                found = True
-
-        if not found:
+        if peptide.get_dummy() not in self.peptide_dummies:
+            self.peptide_dummies.add(peptide.get_dummy())
             self.peptides.append(peptide)
 
     def __str__(self) -> str:
@@ -85,7 +82,7 @@ class Group:
                 group_map[uniprot] = group
 
 
-        peptide_map: dict[Group, set[str]] = {}
+        peptide_map: dict[Group, set[int]] = {}
         for protein in proteins:
             uniprot = protein.get_uniprot()
             index = uniprot.rfind('-')
@@ -100,36 +97,41 @@ class Group:
                 if group not in peptide_map:
                     peptide_map[group] = set()
 
-                peptide_set = peptide_map[group]
-
-                peptides = protein.search_peptides()
-                for peptide in peptides:
-                    peptide_set.add(peptide.get_dummy())
+                peptide_map[group] |= protein.get_peptide_ids()
             else:
                 protein.set_group(None)
 
 
+        # peptide id -> indexes (in peptide_map order) of the groups containing it
+        group_list: list[Group] = list(peptide_map.keys())
+        postings: dict[int, list[int]] = defaultdict(list)
+        for i, current in enumerate(group_list):
+            for peptide_id in peptide_map[current]:
+                postings[peptide_id].append(i)
+
         for protein in proteins:
             group = protein.get_group()
             if group is None:
-                peptides = protein.search_peptides()
-                
-                for current in peptide_map.keys():
-                    peptide_set = peptide_map.get(current)
-                    flag = True
-                    for peptide in peptides:
-                        if peptide.get_dummy() not in peptide_set:
-                            flag = False
-
-                    if flag:
-                        group = current
+                peptide_ids = protein.get_peptide_ids()
+
+                # the last group (in peptide_map order) containing all of the protein's peptides
+                if len(peptide_ids) == 0:
+                    if len(group_list) > 0:
+                        group = group_list[-1]
+                else:
+                    rarest = min(peptide_ids, key=lambda peptide_id: len(postings.get(peptide_id, ())))
+                    for i in reversed(postings.get(rarest, ())):
+                        if peptide_ids <= peptide_map[group_list[i]]:
+                            group = group_list[i]
+                            break
 
                 if group is None:
                     id = f'PG{dataset.get_number()}_{len(groups)+1}'
                     group = Group(id)
-                    peptide_map[group] = set()
-                    for peptide in peptides:
-                        peptide_map[group].add(peptide.get_dummy())
+                    peptide_map[group] = set(peptide_ids)
+                    for peptide_id in peptide_ids:
+                        postings[peptide_id].append(len(group_list))
+                    group_list.append(group)
                     groups.append(group)
 
                 protein.set_group(group)
@@ -8,7 +8,7 @@ if TYPE_CHECKING:
      from .peptide import PeptideMatch
 
 
-@dataclass
+@dataclass(slots=True)
 class Isoform:
     id: str | None = None
     uniprot: str | None = None
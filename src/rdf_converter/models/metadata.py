@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+import logging
+import xml.etree.ElementTree as ET
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class MetadataDocument:
+    '''Repository metadata XML parsed once and shared by the readers.
+
+    `files` holds (name, type) of every `FileList/File` in document order.
+    When read with `iterparse=True`, `File` elements without a `Profile` are
+    dropped from the tree after their name and type are recorded, so a list
+    of many raw files does not stay in memory as elements.
+    '''
+    root: ET.Element
+    files: list[tuple[str | None, str | None]] = field(default_factory=list)
+
+    def get_root(self) -> ET.Element:
+        return self.root
+
+    def get_files(self) -> list[tuple[str | None, str | None]]:
+        return self.files
+
+    @staticmethod
+    def get_file_entry(file: ET.Element) -> tuple[str | None, str | None]:
+        name = None
+        type = None
+
+        name_tag = file.find('Name')
+        if name_tag is not None:
+            name = name_tag.text
+
+        type_tag = file.find('Type')
+        if type_tag is not None:
+            type = type_tag.text
+
+        return (name, type)
+
+    @staticmethod
+    def read(xml_path: str, iterparse: bool = False) -> MetadataDocument:
+        if iterparse:
+            document = MetadataDocument.iterparse(xml_path)
+        else:
+            root = ET.parse(xml_path).getroot()
+            files = [MetadataDocument.get_file_entry(file) for file in root.findall('FileList/File')]
+            document = MetadataDocument(root, files)
+
+        logger.info(f'Metadata: {xml_path} ({len(document.get_files())} files)')
+        return document
+
+    @staticmethod
+    def iterparse(xml_path: str) -> MetadataDocument:
+        root = None
+        files = []
+        path = []
+        file_list = None
+
+        for event, element in ET.iterparse(xml_path, events=('start', 'end')):
+            if event == 'start':
+                if root is None:
+                    root = element
+                path.append(element.tag)
+                if path[1:] == ['FileList']:
+                    file_list = element
+            else:
+                if path[1:] == ['FileList', 'File']:
+                    files.append(MetadataDocument.get_file_entry(element))
+                    if element.find('Profile') is None:
+                        file_list.remove(element)
+                path.pop()
+
+        return MetadataDocument(root, files)
+
+    @staticmethod
+    def get_document(meta: str | MetadataDocument) -> MetadataDocument:
+        if isinstance(meta, MetadataDocument):
+            return meta
+        return MetadataDocument.read(meta)
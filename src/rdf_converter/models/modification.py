@@ -2,8 +2,10 @@ from __future__ import annotations
 
 from dataclasses import dataclass, field
 from ..utils.string_tool import is_not_empty
-import xml.etree.ElementTree as ET
-import requests 
+from ..utils.jpost_repository import LocalRepository, RemoteRepository
+from ..utils.modification_cache import ModificationCache
+from contextlib import closing
+from typing import Iterable
 import re
 import os
 from dotenv import load_dotenv
@@ -51,13 +53,69 @@ class Modification:
         f.write(f'        a unimod:UNIMOD_{self.unimod} \n')
 
 
+    def to_dict(self) -> dict:
+        return {'title': self.title, 'unimod': self.unimod, 'site': self.site}
+
+    @staticmethod
+    def from_dict(values: dict) -> Modification:
+        modification = Modification()
+        modification.set_title(values.get('title'))
+        modification.set_unimod(values.get('unimod'))
+        modification.set_site(values.get('site'))
+        return modification
+
+    @staticmethod
+    def create_repository() -> RemoteRepository | LocalRepository:
+        local_dir = os.getenv('MODIFICATION_LOCAL_DIR')
+        if is_not_empty(local_dir):
+            return LocalRepository(local_dir)
+
+        repository_url = os.getenv('REPOSITORY_URL', 'https://repository.jpostdb.org/xml/')
+        storage_url = os.getenv('STORAGE_URL', 'https://storage.jpostdb.org/')
+        return RemoteRepository(repository_url, storage_url)
+
     @staticmethod
     def get_modifications_from_jpost_repo(project_id: str):
         load_dotenv()
-        repository_url = os.getenv('REPOSITORY_URL', 'https://repository.jpostdb.org/xml/')
+        repository = Modification.create_repository()
+
+        cache_dir = os.getenv('MODIFICATION_CACHE')
+        if is_not_empty(cache_dir):
+            ttl = float(os.getenv('MODIFICATION_CACHE_TTL', '86400'))
+            entry = ModificationCache(cache_dir, ttl).get_or_fetch(project_id, repository, Modification.fetch_modifications)
+        else:
+            entry = Modification.fetch_modifications(repository, project_id)
 
-        xml_url = f'{repository_url}{project_id}.0.xml'
-        response = requests.get(xml_url)
+        if entry is None:
+            return [], []
+
+        fixed_mods = [Modification.from_dict(values) for values in entry['fixed']]
+        variable_mods = [Modification.from_dict(values) for values in entry['variable']]
+        return fixed_mods, variable_mods
+
+    @staticmethod
+    def fetch_modifications(repository: RemoteRepository | LocalRepository, project_id: str) -> dict | None:
+        result_file = repository.get_result_file(project_id)
+        if result_file is None:
+            return None
+
+        result = repository.open_result(project_id, result_file)
+        if result is None:
+            return None
+
+        etag, lines = result
+        with closing(lines):
+            fixed_mods, variable_mods = Modification.read_mtd_modifications(lines)
+        return {
+            'project_id': project_id,
+            'result_file': result_file,
+            'etag': etag,
+            'fixed': [modification.to_dict() for modification in fixed_mods],
+            'variable': [modification.to_dict() for modification in variable_mods],
+        }
+
+    @staticmethod
+    def read_mtd_modifications(lines: Iterable[str]) -> tuple[list[Modification], list[Modification]]:
         fixed_mods = []
         variable_mods = []
 
@@ -66,80 +124,62 @@ class Modification:
         pattern_fixed_site = re.compile(r"^fixed_mod\[(\d+)\]-site")
         pattern_variable_site = re.compile(r"^variable_mod\[(\d+)\]-site")
 
-        if response.status_code == 200:
-            root = ET.fromstring(response.content)
-
-            file_tags = root.findall('FileList/File')
-            result_file = None
-            for file_tag in file_tags:
-                type = file_tag.find('Type').text
-                if type == 'result':
-                    result_file = file_tag.find('Name').text
-
-            if result_file is not None:
-                result_url = f'https://storage.jpostdb.org/{project_id}/{result_file}'
-                response = requests.get(result_url)
-                fixed_mod_map = {}
-                variable_mod_map = {}
-                for line in response.iter_lines():
-                    tokens = line.decode('utf-8').split('\t')
-                    if len(tokens) >= 3:
-                        if tokens[0] == 'MTD':
-                            match_fixed = pattern_fixed.match(tokens[1])
-                            match_variable = pattern_variable.match(tokens[1])
-                            match_fixed_site = pattern_fixed_site.match(tokens[1])
-                            match_variable_site = pattern_variable_site.match(tokens[1])
-
-                            if match_fixed_site:
-                                index = match_fixed_site.group(0)
-                                site = tokens[2].strip()
-                                if index in fixed_mod_map:
-                                    fixed_mod_map[index]['site'] = site
-                            elif match_variable_site:
-                                index = match_variable_site.group(0)
-                                site = tokens[2].strip()
-                                if index in variable_mod_map:
-                                    variable_mod_map[index]['site'] = site
-                            elif match_fixed:
-                                if not tokens[1].endswith('-position'):
-                                    index = match_fixed.group(0)
-                                    values = tokens[2].replace('[', '').replace(']', '').split(',')
-                                    fixed_mod_map[index] = {'unimod': values[1].strip().replace('UNIMOD:', ''),
-                                                            'name': values[2].strip()}
-                            elif match_variable:
-                                if not tokens[1].endswith('-position'):
-                                    index = match_variable.group(0)
-                                    values = tokens[2].replace('[', '').replace(']', '').split(',')
-                                    variable_mod_map[index] = {'unimod': values[1].strip().replace('UNIMOD:', ''),
-                                                            'name': values[2].strip()}
-                            
-
-                for mod_dic in fixed_mod_map.values():
-                    modification = Modification()
-                    modification.set_unimod(mod_dic['unimod'])
-                    title = mod_dic['name']
-                    if 'site' in mod_dic:
-                        title += f" ({mod_dic['site']})"
-                        modification.set_site(mod_dic['site'])
-                    modification.set_title(title)
-                    fixed_mods.append(modification)
-
-                for mod_dic in variable_mod_map.values():
-                    modification = Modification()
-                    modification.set_unimod(mod_dic['unimod'])
-                    title = mod_dic['name']
-                    if 'site' in mod_dic:
-                        title += f" ({mod_dic['site']})"
-                        modification.set_site(mod_dic['site'])
-                    modification.set_title(title)
-                    variable_mods.append(modification)
+        fixed_mod_map = {}
+        variable_mod_map = {}
+        for line in lines:
+            # a UTF-8 BOM would otherwise hide the first MTD line from the section check
+            tokens = line.lstrip('\ufeff').split('\t')
+            # the metadata section comes first; stop at the first table header or row
+            if tokens[0] not in ('MTD', 'COM', ''):
+                break
+            if len(tokens) >= 3:
+                if tokens[0] == 'MTD':
+                    match_fixed = pattern_fixed.match(tokens[1])
+                    match_variable = pattern_variable.match(tokens[1])
+                    match_fixed_site = pattern_fixed_site.match(tokens[1])
+                    match_variable_site = pattern_variable_site.match(tokens[1])
+
+                    if match_fixed_site:
+                        index = match_fixed_site.group(0)
+                        site = tokens[2].strip()
+                        if index in fixed_mod_map:
+                            fixed_mod_map[index]['site'] = site
+                    elif match_variable_site:
+                        index = match_variable_site.group(0)
+                        site = tokens[2].strip()
+                        if index in variable_mod_map:
+                            variable_mod_map[index]['site'] = site
+                    elif match_fixed:
+                        if not tokens[1].endswith('-position'):
+                            index = match_fixed.group(0)
+                            values = tokens[2].replace('[', '').replace(']', '').split(',')
+                            fixed_mod_map[index] = {'unimod': values[1].strip().replace('UNIMOD:', ''),
+                                                    'name': values[2].strip()}
+                    elif match_variable:
+                        if not tokens[1].endswith('-position'):
+                            index = match_variable.group(0)
+                            values = tokens[2].replace('[', '').replace(']', '').split(',')
+                            variable_mod_map[index] = {'unimod': values[1].strip().replace('UNIMOD:', ''),
+                                                    'name': values[2].strip()}
+
+        for mod_dic in fixed_mod_map.values():
+            modification = Modification()
+            modification.set_unimod(mod_dic['unimod'])
+            title = mod_dic['name']
+            if 'site' in mod_dic:
+                title += f" ({mod_dic['site']})"
+                modification.set_site(mod_dic['site'])
+            modification.set_title(title)
+            fixed_mods.append(modification)
+
+        for mod_dic in variable_mod_map.values():
+            modification = Modification()
+            modification.set_unimod(mod_dic['unimod'])
+            title = mod_dic['name']
+            if 'site' in mod_dic:
+                title += f" ({mod_dic['site']})"
+                modification.set_site(mod_dic['site'])
+            modification.set_title(title)
+            variable_mods.append(modification)
 
         return fixed_mods, variable_mods
-                
-                        
-
-
-
-
-
-
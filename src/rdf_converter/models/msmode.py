@@ -4,7 +4,7 @@ from dataclasses import dataclass, field
 import logging
 
 from statistics import mode
-from xml.etree import ElementTree as ET
+from .metadata import MetadataDocument
 
 from typing import TYPE_CHECKING
 
@@ -100,11 +100,10 @@ class MsMode:
 
 
     @staticmethod
-    def read_ms_mode(dataset: DataSet, xml_path: str) -> MsMode:
+    def read_ms_mode(dataset: DataSet, xml_path: str | MetadataDocument) -> MsMode:
         ms_mode = MsMode(dataset)
 
-        tree = ET.parse(xml_path)
-        root = tree.getroot()
+        root = MetadataDocument.get_document(xml_path).get_root()
 
         tag = root.find('FileList/File/Profile/MS_mode')
         if tag is not None:
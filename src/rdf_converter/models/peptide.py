@@ -2,24 +2,26 @@ from __future__ import annotations
 
 from collections import defaultdict
 from dataclasses import dataclass, field
-from typing import ClassVar
+from typing import ClassVar, Iterator
 
 from typing import TYPE_CHECKING
 if TYPE_CHECKING:
     from .dataset import DataSet
     from .protein import Protein
 
-from .psm import Psm
+from .psm import Psm, PsmTable
 
 import os
 import csv
+import sys
 
 
-@dataclass
+@dataclass(slots=True)
 class Peptide:
     dataset: DataSet
     id: str | None = None
-    psms: list[Psm] = field(default_factory=list)
+    psm_table: PsmTable | None = None
+    psm_indices: range = range(0)
     sequence: str | None = None
     dummy: str | None = None
     unique: bool = False
@@ -37,13 +39,17 @@ class Peptide:
         self.dataset = dataset
         self.id = f'PEP{dataset.get_number()}_{Peptide.counter}'
 
-        self.psms = []
-        self.sequence = sequence
+        self.psm_table = None
+        self.psm_indices = range(0)
+        self.sequence = sys.intern(sequence)
         self.set_dummy(sequence)
         self.distinguishable_peptides = []
 
+        self.unique = False
+        self.unique_at_mslevel = False
         self.score = 0.0
         self.fdr = 0.0
+        self.mod = None
 
     
     def get_dataset(self) -> DataSet:
@@ -56,10 +62,14 @@ class Peptide:
         self.id = id
     
     def get_psms(self) -> list[Psm]:
-        return self.psms
-    
-    def set_psms(self, psms: list[Psm]) -> None:
-        self.psms = psms
+        return [Psm(self.psm_table, index) for index in self.psm_indices]
+
+    def get_psm_indices(self) -> range:
+        return self.psm_indices
+
+    def set_psm_range(self, psm_table: PsmTable, start: int, stop: int) -> None:
+        self.psm_table = psm_table
+        self.psm_indices = range(start, stop)
     
     def get_sequence(self) -> str | None:
         return self.sequence
@@ -104,7 +114,7 @@ class Peptide:
         return self.distinguishable_peptides
 
     def __str__(self):
-        return f'Peptide(id={self.id}, sequence={self.sequence}, psms={len(self.psms)})'
+        return f'Peptide(id={self.id}, sequence={self.sequence}, psms={len(self.psm_indices)})'
     
 
     def to_ttl(self, f) -> None:
@@ -134,8 +144,8 @@ class Peptide:
         f.write(f'        rdf:value "{self.get_sequence()}" ;\n')
         f.write('    ];\n')
 
-        for psm in self.get_psms():
-            f.write(f'    jpost:hasPsm :{psm.get_id()} ;\n')
+        for index in self.get_psm_indices():
+            f.write(f'    jpost:hasPsm :{self.psm_table.get_id(index)} ;\n')
 
 
         for indistinguishable in self.get_distinguishable_peptides():
@@ -147,16 +157,25 @@ class Peptide:
     def create_dummy(sequence: str) -> str:
         dummy = sequence.replace('I', 'J')
         dummy = dummy.replace('L', 'J')
-        return dummy
+        return sys.intern(dummy)
     
     @staticmethod
     def read_peptides(dataset: DataSet, tsv_path: str) -> list[Peptide]:
         peptides: list[Peptide] = []
+        for batch in Peptide.iter_peptides(dataset, tsv_path):
+            peptides.extend(batch)
+        return peptides
 
+    @staticmethod
+    def iter_peptides(dataset: DataSet, tsv_path: str, batch_size: int = 10000) -> Iterator[list[Peptide]]:
         if not os.path.exists(tsv_path):
-            return peptides
-        
+            return
+
+        psm_table = dataset.get_psm_table()
+        if psm_table is None:
+            psm_table = PsmTable(dataset)
 
+        batch: list[Peptide] = []
 
         with open(tsv_path, 'r', encoding='utf-8') as f:
             reader = csv.reader(f, delimiter='\t')
@@ -247,73 +266,115 @@ class Peptide:
                 peptide = Peptide(dataset, sequence)
                 peptide.set_mod(mod if mod.startswith('Label:') else '')
 
-                psms = []
+                start = len(psm_table)
                 for i in range(hits):
-                    current_psms = []
+                    jpost_score = None
+                    if i < len(jpost_scores):
+                        jpost_score = jpost_scores[i]
+                        try:
+                            value = float(jpost_score)
+                            if value > max_jpost_score:
+                                max_jpost_score = value
+                        except:
+                            pass
+
+                    score_engine = None
+                    score_ev = None
+                    score_value = None
+                    if i < len(scores):
+                        tokens = scores[i].split('/')
+                        if len(tokens) >= 4:
+                            score_engine = tokens[1]
+                            score_ev = tokens[2]
+                            score_value = tokens[3]
+
+                    phospho_ambiguous = ()
+                    if i < len(ambigious):
+                        phospho_ambiguous = tuple(token for token in ambigious[i].split('/') if token != '')
+
+                    psm_mods = [(mod, mod_detail)]
                     if mod.startswith('Label:'):
-                        psm1 = Psm(dataset)
-                        psm1.set_mod('')
-                        psm1.set_mod_detail('')
-                        current_psms.append(psm1)
-
-                        psm2 = Psm(dataset)
-                        psm2.set_mod(mod)
-                        psm2.set_mod_detail(mod_detail)
-                        current_psms.append(psm2)
-                    else:
-                        psm = Psm(dataset)
-                        psm.set_mod(mod)
-                        psm.set_mod_detail(mod_detail)
-                        current_psms.append(psm)
-
-                    for psm in current_psms:
-                        psm.set_sequence(sequence)
-                        psm.set_title(title)
-                        psm.set_calc_mz(calc_mz)
-                        psm.set_fdr(fdr)
-
-                        if i < len(rts):
-                            psm.set_rt(rts[i])
-                        if i < len(jpost_scores):
-                            psm.set_jpost_score(jpost_scores[i])
-                            try:
-                                jpost_score = float(jpost_scores[i])
-                                if jpost_score > max_jpost_score:
-                                    max_jpost_score = jpost_score
-                            except:
-                                pass
-                        if i < len(masses):
-                            psm.set_obs_mz(masses[i])
-                        if i < len(charges):
-                            psm.set_charge(charges[i])
-                        if i < len(files):
-                            psm.set_raw_file(files[i])
-                        if i < len(scans):
-                            psm.set_scan(scans[i])
-                        if i < len(scores):
-                            tokens = scores[i].split('/')
-                            if len(tokens) >= 4:
-                                psm.get_score_map()['ev'] = tokens[2]
-                                psm.get_score_map()[tokens[1]] = tokens[3]
-                        if confirmed is not None and i < len(confirmed):
-                            psm.set_phospho_confirmed(confirmed[i])
-                        if ambigious is not None and i < len(ambigious):
-                            tokens = ambigious[i].split('/')
-                            for token in tokens:
-                                if token != '':
-                                    psm.get_phospho_ambiguous().append(token)
-                        psm.set_peptide(peptide)
-                        psms.append(psm)
-
-                    
+                        psm_mods = [('', ''), (mod, mod_detail)]
+
+                    for psm_mod, psm_mod_detail in psm_mods:
+                        psm_table.add_psm(
+                            peptide, title, calc_mz, psm_mod, psm_mod_detail,
+                            rt=rts[i] if i < len(rts) else None,
+                            jpost_score=jpost_score,
+                            obs_mz=masses[i] if i < len(masses) else None,
+                            charge=charges[i] if i < len(charges) else None,
+                            raw_file=files[i] if i < len(files) else None,
+                            scan=scans[i] if i < len(scans) else None,
+                            score_engine=score_engine,
+                            score_ev=score_ev,
+                            score_value=score_value,
+                            phospho_confirmed=confirmed[i] if i < len(confirmed) else None,
+                            phospho_ambiguous=phospho_ambiguous
+                        )
+
                 peptide.set_score(max_jpost_score)
                 peptide.set_fdr(fdr)
-                peptide.set_psms(psms)
-                peptides.append(peptide)
+                peptide.set_psm_range(psm_table, start, len(psm_table))
+                batch.append(peptide)
 
-        return peptides
+                if len(batch) >= batch_size:
+                    yield batch
+                    batch = []
+
+        if len(batch) > 0:
+            yield batch
     
 
+    @staticmethod
+    def iter_peptides_columnar(dataset: DataSet, tsv_path: str, batch_size: int = 10000) -> Iterator[list[Peptide]]:
+        from ..utils.psm_frame import read_psm_frames
+
+        if not os.path.exists(tsv_path):
+            return
+
+        psm_table = dataset.get_psm_table()
+        if psm_table is None:
+            psm_table = PsmTable(dataset)
+
+        for peptide_frame, psm_frame in read_psm_frames(tsv_path, batch_size):
+            batch: list[Peptide] = []
+            for sequence, mod, fdr, score in zip(
+                peptide_frame['sequence'].tolist(),
+                peptide_frame['mod'].tolist(),
+                peptide_frame['fdr'].tolist(),
+                peptide_frame['score'].tolist()
+            ):
+                peptide = Peptide(dataset, sequence)
+                peptide.set_mod(mod)
+                peptide.set_score(score)
+                peptide.set_fdr(fdr)
+                batch.append(peptide)
+
+            titles = peptide_frame['title'].tolist()
+            calc_mzs = peptide_frame['calc_mz'].tolist()
+            starts: dict[int, int] = {}
+            for record in psm_frame.itertuples(index=False):
+                peptide = batch[record.row]
+                index = psm_table.add_psm(
+                    peptide, titles[record.row], calc_mzs[record.row], record.mod, record.mod_detail,
+                    rt=record.rt,
+                    jpost_score=record.jpost_score,
+                    obs_mz=record.obs_mz,
+                    charge=record.charge,
+                    raw_file=record.raw_file,
+                    scan=record.scan,
+                    score_engine=record.score_engine,
+                    score_ev=record.score_ev,
+                    score_value=record.score_value,
+                    phospho_confirmed=record.phospho_confirmed,
+                    phospho_ambiguous=tuple(record.phospho_ambiguous)
+                )
+                start = starts.setdefault(record.row, index)
+                peptide.set_psm_range(psm_table, start, index + 1)
+
+            yield batch
+
+
     @staticmethod
     def check_peptides(proteins: list[Protein], peptides: list[Peptide]) -> None:
         seq_freq   = defaultdict(int)
@@ -326,7 +387,7 @@ class Peptide:
             plist = protein.search_peptides()
 
             seq_set   = {p.get_sequence() for p in plist}
-            dummy_set = {p.get_dummy()    for p in plist}
+            dummy_set = protein.get_peptide_ids()
 
             for seq in seq_set:
                 seq_freq[seq] += 1
@@ -2,6 +2,7 @@ from __future__ import annotations
 
 from dataclasses import dataclass, field
 from .dataset import DataSet
+from .metadata import MetadataDocument
 
 from ..utils.string_tool import is_not_empty
 
@@ -142,11 +143,8 @@ class Project:
 
 
     @staticmethod
-    def read_project(xml_path: str) -> Project:
-        import xml.etree.ElementTree as ET
-
-        tree = ET.parse(xml_path)
-        root = tree.getroot()
+    def read_project(xml_path: str | MetadataDocument) -> Project:
+        root = MetadataDocument.get_document(xml_path).get_root()
 
         node = root.find('Project')
         id = node.get('id')
@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from dataclasses import dataclass, field
-from typing import Optional, List, Dict, Tuple
+from typing import ClassVar, Optional, List, Dict, Tuple, Iterator
 import logging
 from typing import TYPE_CHECKING
 
@@ -12,7 +12,9 @@ if TYPE_CHECKING:
     from .group import Group
 from .isoform import Isoform
 from .peptide import Peptide
-from .fasta import Fasta
+from .fasta import FastaIndex
+from ..utils.peptide_matcher import PeptideMatcher
+from ..utils.index_cache import IndexCache, directory_size
 
 
 
@@ -23,14 +25,22 @@ logger = logging.getLogger(__name__)
 from dotenv import load_dotenv
 import os
 import subprocess
+import sys
+import psutil
 import pulp
 import heapq
+from array import array
+import tempfile
+import time
+from contextlib import contextmanager
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 
 
 from pathlib import Path
 
 
-@dataclass
+@dataclass(slots=True)
 class PeptideMatch:
     peptide: Peptide | None = None
     hit_sequence: str | None = None
@@ -40,6 +50,7 @@ class PeptideMatch:
 
     def __init__(self):
         self.peptide = None
+        self.hit_sequence = None
         self.start = None
         self.end = None
         self.matched_l_eq_i_positions = None
@@ -54,7 +65,7 @@ class PeptideMatch:
         return self.hit_sequence
     
     def set_hit_sequence(self, hit_sequence: str) -> None:
-        self.hit_sequence = hit_sequence
+        self.hit_sequence = sys.intern(hit_sequence) if hit_sequence is not None else None
 
     def set_start(self, start: str) -> None:
         self.start = start
@@ -94,13 +105,14 @@ class PeptideMatch:
         f.write(f'    ] ;\n')
 
 
-@dataclass
+@dataclass(slots=True)
 class Protein:
     dataset: DataSet | None = None
     id: str | None = None
     title: str | None = None
     uniprot: str | None = None
-    peptides: List[PeptideMatch] = field(default_factory=list)
+    peptide_matches: List[PeptideMatch] = field(default_factory=list)
+    match_keys: set[tuple[str, str, str]] = field(default_factory=set)
     type: str | None = None
     group: Group | None = None
     in_optimization_list: bool = False
@@ -110,13 +122,19 @@ class Protein:
     subset: bool = False
     leading_protein: list[Protein] = field(default_factory=list)
     isoforms: list[Isoform] = field(default_factory=list)
+    searched_peptides: list[Peptide] | None = None
+    peptide_ids: frozenset[int] | None = None
+
+    # ILPs with fewer proteins are solved without the greedy warm start
+    ILP_WARM_START_PROTEINS: ClassVar[int] = 20
 
     def __init__(self, dataset: DataSet, uniprot: str, title: str = None):
         self.dataset = dataset
         self.id = f'PRT{dataset.get_number()}_{uniprot}'
-        self.uniprot = uniprot
+        self.uniprot = sys.intern(uniprot)
         self.title = title
         self.peptide_matches = []
+        self.match_keys = set()
         self.type = None
         self.group = None
         self.in_optimization_list = False
@@ -126,6 +144,8 @@ class Protein:
         self.subset = False
         self.leading_protein = []
         self.isoforms = []
+        self.searched_peptides = None
+        self.peptide_ids = None
 
     def get_dataset(self) -> DataSet | None:
         return self.dataset
@@ -162,12 +182,10 @@ class Protein:
             hit_sequence: str = None, 
             matched_l_eq_i_positions: str = None
     ) -> None:
-        flag = True
-        for match in self.peptide_matches:
-            if match.get_peptide().get_sequence() == peptide.get_sequence() and match.get_start() == start and match.get_end() == end:
-                flag = False
-        
-        if flag:
+        key = (peptide.get_sequence(), start, end)
+        if key not in self.match_keys:
+            self.match_keys.add(key)
+            self.clear_peptide_cache()
             match = PeptideMatch()
             match.set_peptide(peptide)
             match.set_start(start)
@@ -175,18 +193,24 @@ class Protein:
             match.set_hit_sequence(hit_sequence)
             match.set_matched_l_eq_i_positions(matched_l_eq_i_positions)
             if matched_l_eq_i_positions != '' and matched_l_eq_i_positions is not None:
-                poses = matched_l_eq_i_positions.split(',')
-                hit_sequence = peptide.get_sequence()
-                for pos in poses:
-                    index = int(pos) - int(start)
-                    if hit_sequence[index] == 'L':
-                        hit_sequence = hit_sequence[:index] + 'I' + hit_sequence[index + 1:]
-                    elif hit_sequence[index] == 'I':
-                        hit_sequence = hit_sequence[:index] + 'L' + hit_sequence[index + 1:]
+                hit_sequence = Protein.swap_l_and_i(peptide.get_sequence(), start, matched_l_eq_i_positions)
                 match.set_hit_sequence(hit_sequence)
             
             self.peptide_matches.append(match)
 
+    @staticmethod
+    @lru_cache(maxsize=65536)
+    def swap_l_and_i(sequence: str, start: str, matched_l_eq_i_positions: str) -> str:
+        residues = list(sequence)
+        offset = int(start)
+        for pos in matched_l_eq_i_positions.split(','):
+            index = int(pos) - offset
+            if residues[index] == 'L':
+                residues[index] = 'I'
+            elif residues[index] == 'I':
+                residues[index] = 'L'
+        return ''.join(residues)
+
     def is_in_optimization_list(self) -> bool:
         return self.in_optimization_list
     
@@ -221,7 +245,12 @@ class Protein:
         return self.leading_protein
     
     def set_isoform(self, isoform: list[Isoform]) -> None:
-        self.isoform = isoform
+        self.isoforms = isoform
+        self.clear_peptide_cache()
+
+    def add_isoform(self, isoform: Isoform) -> None:
+        self.isoforms.append(isoform)
+        self.clear_peptide_cache()
 
     def get_isoforms(self) -> list[Isoform]:
         return self.isoforms
@@ -238,7 +267,20 @@ class Protein:
 
         return found
     
+    def clear_peptide_cache(self) -> None:
+        self.searched_peptides = None
+        self.peptide_ids = None
+
+    def get_peptide_ids(self) -> frozenset[int]:
+        if self.peptide_ids is None:
+            dataset = self.get_dataset()
+            self.peptide_ids = frozenset(dataset.get_dummy_id(peptide.get_dummy()) for peptide in self.search_peptides())
+        return self.peptide_ids
+
     def search_peptides(self) -> list[Peptide]:
+        if self.searched_peptides is not None:
+            return self.searched_peptides
+
         peptides = []
         sequence_set = set()
 
@@ -256,6 +298,7 @@ class Protein:
                     sequence_set.add(sequence)
                     peptides.append(match.get_peptide())
 
+        self.searched_peptides = peptides
         return peptides
 
 
@@ -310,30 +353,42 @@ class Protein:
         return uniprot_id       
 
     @staticmethod
-    def create_db_index(fasta_path: str, work_dir: str) -> Path:
+    @contextmanager
+    def use_db_index(fasta_path: str, work_dir: str) -> Iterator[Path]:
         load_dotenv()
         java_bin = os.getenv('JAVA_BIN', 'java')
         peptide_match_jar = os.getenv('PEPTIDEMATCH_JAR', './lib/PeptideMatchCMD.jar')  
-        
+        cache_dir = os.getenv('PEPTIDEMATCH_INDEX_CACHE')
+        cache_size = int(os.getenv('PEPTIDEMATCH_INDEX_CACHE_MB', '0'))
+
         dir = Path(work_dir)
-        db_index = dir / 'db_index'
 
-        args = ['-a', 'index', '-d', fasta_path, '-i', db_index.resolve()]
+        def build(index_dir: Path) -> None:
+            db_index = index_dir / 'db_index'
+            args = ['-a', 'index', '-d', fasta_path, '-i', db_index.resolve()]
+            cmd = [java_bin, '-jar', peptide_match_jar] + args
 
-        cmd = [java_bin, '-jar', peptide_match_jar] + args
+            logger.info(f'Creating PeptideMatch DB index: {cmd}')
 
-        logger.info(f'Creating PeptideMatch DB index: {cmd}')
+            with open(dir / 'db_index.log', 'w') as log_file:
+                subprocess.run(cmd, stdout=log_file, stderr=subprocess.STDOUT, check=True)
 
-        with open(dir / 'db_index.log', 'w') as log_file:
-            subprocess.run(cmd, stdout=log_file, stderr=subprocess.STDOUT, check=True)
-    
-        return db_index.resolve()
+        if cache_dir:
+            cache = IndexCache(cache_dir, cache_size * 1024 * 1024)
+            key = cache.create_key(fasta_path, peptide_match_jar, ['-a', 'index'])
+            # the cache keeps the entry from being evicted until the queries are done
+            with cache.use(key, build) as entry:
+                yield (entry / 'db_index').resolve()
+            return
+
+        build(dir)
+        yield (dir / 'db_index').resolve()
     
 
     @staticmethod
-    def write_sequences_file(peptides: list[Peptide], work_dir: str) -> Path:
+    def write_sequences_file(peptides: list[Peptide], work_dir: str, file_name: str = 'peptides.txt') -> Path:
         dir = Path(work_dir)
-        peptide_file = dir / 'peptides.txt'
+        peptide_file = dir / file_name
         with open(peptide_file, 'w') as f:
             for peptide in peptides:
                 f.write(f'{peptide.get_sequence()}\n')
@@ -343,14 +398,56 @@ class Protein:
     @staticmethod
     def execute_peptide_match(peptides: list[Peptide], db_index: Path, work_dir: str) -> Path:
         load_dotenv()
+        shard_count = int(os.getenv('PEPTIDEMATCH_SHARDS', '1'))
+        min_shard_size = int(os.getenv('PEPTIDEMATCH_MIN_SHARD_SIZE', '10000'))
 
-        java_bin = os.getenv('JAVA_BIN', 'java')
-        peptide_match_jar = os.getenv('PEPTIDEMATCH_JAR', './lib/PeptideMatchCMD.jar')  
-        
         dir = Path(work_dir)
         output_path = dir / 'peptide_matches.txt'
 
-        peptide_list_file = Protein.write_sequences_file(peptides, work_dir)
+        shard_count = max(1, min(shard_count, len(peptides) // max(min_shard_size, 1)))
+        if shard_count > 1:
+            # every jar process loads the whole index
+            index_size = directory_size(db_index) if db_index.is_dir() else db_index.stat().st_size
+            max_shards = max(1, psutil.virtual_memory().available // max(index_size, 1))
+            if shard_count > max_shards:
+                logger.info(f'Limiting PeptideMatch shards to {max_shards} by available memory')
+                shard_count = max_shards
+        if shard_count == 1:
+            peptide_list_file = Protein.write_sequences_file(peptides, work_dir)
+            Protein.run_peptide_match_query(peptide_list_file, db_index, output_path, dir / 'peptide_match.log')
+            return output_path.resolve()
+
+        shard_size = (len(peptides) + shard_count - 1) // shard_count
+        shards = []
+        for i in range(shard_count):
+            shard_peptides = peptides[i * shard_size:(i + 1) * shard_size]
+            if len(shard_peptides) > 0:
+                peptide_list_file = Protein.write_sequences_file(shard_peptides, work_dir, f'peptides_{i}.txt')
+                shards.append((peptide_list_file, dir / f'peptide_matches_{i}.txt', dir / f'peptide_match_{i}.log'))
+
+        logger.info(f'Executing PeptideMatch in {len(shards)} shards')
+        with ThreadPoolExecutor(max_workers=len(shards)) as executor:
+            futures = [
+                executor.submit(Protein.run_peptide_match_query, peptide_list_file, db_index, shard_output, log_path)
+                for peptide_list_file, shard_output, log_path in shards
+            ]
+            for future in futures:
+                future.result()
+
+        with open(output_path, 'w') as fw:
+            for i, (_, shard_output, _) in enumerate(shards):
+                with open(shard_output, 'r') as fr:
+                    for line in fr:
+                        if i == 0 or not line.startswith('#'):
+                            fw.write(line)
+
+        return output_path.resolve()
+
+
+    @staticmethod
+    def run_peptide_match_query(peptide_list_file: Path, db_index: Path, output_path: Path, log_path: Path) -> None:
+        java_bin = os.getenv('JAVA_BIN', 'java')
+        peptide_match_jar = os.getenv('PEPTIDEMATCH_JAR', './lib/PeptideMatchCMD.jar')  
 
         args = [
             '-a',
@@ -369,21 +466,33 @@ class Protein:
 
         logger.info(f'Executing PeptideMatch: {cmd}')
 
-        with open(dir / 'peptide_match.log', 'w') as log_file:
+        with open(log_path, 'w') as log_file:
             subprocess.run(cmd, stdout=log_file, stderr=subprocess.STDOUT, check=True)
-    
-        return output_path.resolve()
 
     
+    @staticmethod
+    def read_peptide_match_file(peptide_match_file: Path) -> list[list[str]]:
+        rows = []
+        with open(peptide_match_file, 'r') as f:
+            for line in f:
+                if not line.startswith('#'):
+                    rows.append(line.strip().split('\t'))
+        return rows
+
     @staticmethod
     def get_protein_list(peptides: list[Peptide], work_dir: str, fasta_path: str) -> list[Protein]:
         proteins = []
 
-        db_index = Protein.create_db_index(fasta_path, work_dir)
-        peptide_match_file = Protein.execute_peptide_match(peptides, db_index, work_dir)
+        load_dotenv()
+        backend = os.getenv('PEPTIDEMATCH_BACKEND', 'jar')
 
-        fasta_list = Fasta.read_fasta(fasta_path)
-        fasta_map = {Protein.extract_uniprot_id(fasta.get_title()): fasta for fasta in fasta_list}
+        if backend == 'python':
+            matcher = PeptideMatcher.get_instance(fasta_path)
+            match_rows = matcher.match([peptide.get_sequence() for peptide in peptides])
+        else:
+            with Protein.use_db_index(fasta_path, work_dir) as db_index:
+                peptide_match_file = Protein.execute_peptide_match(peptides, db_index, work_dir)
+            match_rows = Protein.read_peptide_match_file(peptide_match_file)
 
         peptide_map = {}
         for peptide in peptides:
@@ -397,48 +506,45 @@ class Protein:
         sequence_set = set(peptide_map.keys())
         hit_set = set()
 
-        with open(peptide_match_file, 'r') as f:
-            for line in f:
-                if not line.startswith('#'):
-                    parts = line.strip().split('\t')
-                    if len(parts) >= 5:
-                        sequence = parts[0]
-                        dummy = Peptide.create_dummy(sequence)
-                        uniprot = parts[1]
-                        uniprot_id = uniprot.split('|')[1] if '|' in uniprot else uniprot
-                        start = parts[3]
-                        end = parts[4]
-                        matched_l_eq_i_positions = parts[5] if len(parts) > 5 else ''
-
-                        fasta = fasta_map.get(uniprot_id)
-                        hit_sequence = sequence
-                        if fasta is not None:
-                            start_position = int(start)
-                            end_position = int(end)
-                            protein_sequence = fasta.get_sequence()
-                            step = 1
-                            if start_position > end_position:
-                                step = -1
-                            hit_sequence = protein_sequence[start_position - 1: end_position: step]
-                            if len(hit_sequence) == 0:
-                                logger.warning(f'Hit sequence is empty for Uniprot ID: {uniprot_id}, start: {start}, end: {end}')
+        with FastaIndex.open(fasta_path, Protein.extract_uniprot_id) as fasta_index:
+            for parts in match_rows:
+                if len(parts) >= 5:
+                    sequence = parts[0]
+                    dummy = Peptide.create_dummy(sequence)
+                    uniprot = parts[1]
+                    uniprot_id = uniprot.split('|')[1] if '|' in uniprot else uniprot
+                    start = parts[3]
+                    end = parts[4]
+                    matched_l_eq_i_positions = parts[5] if len(parts) > 5 else ''
+
+                    hit_sequence = sequence
+                    if uniprot_id in fasta_index:
+                        start_position = int(start)
+                        end_position = int(end)
+                        if start_position <= end_position:
+                            hit_sequence = fasta_index.get_sequence(uniprot_id, start_position, end_position)
                         else:
-                            logger.warning(f'Fasta not found for Uniprot ID: {uniprot_id}')
-
-                        hit_str = f'{dummy}_{uniprot_id}_{start}_{end}'
-                        if hit_str not in hit_set:
-                            hit_set.add(hit_str)
-                            protein = protein_map.get(uniprot_id)                            
-                            if protein is None:
-                                protein = Protein(peptide.get_dataset(), uniprot_id, uniprot)
-                                protein_map[uniprot_id] = protein
-                            proteins.append(protein)
-
-                        if dummy in peptide_map:
-                            for peptide in peptide_map[dummy]:
-                                protein.add_match(peptide, start, end, hit_sequence, matched_l_eq_i_positions)
-                                if peptide.get_sequence() in sequence_set:
-                                    sequence_set.remove(peptide.get_sequence())
+                            protein_sequence = fasta_index.get_sequence(uniprot_id)
+                            hit_sequence = protein_sequence[start_position - 1: end_position: -1]
+                        if len(hit_sequence) == 0:
+                            logger.warning(f'Hit sequence is empty for Uniprot ID: {uniprot_id}, start: {start}, end: {end}')
+                    else:
+                        logger.warning(f'Fasta not found for Uniprot ID: {uniprot_id}')
+
+                    hit_str = f'{dummy}_{uniprot_id}_{start}_{end}'
+                    if hit_str not in hit_set:
+                        hit_set.add(hit_str)
+                        protein = protein_map.get(uniprot_id)                            
+                        if protein is None:
+                            protein = Protein(peptide.get_dataset(), uniprot_id, uniprot)
+                            protein_map[uniprot_id] = protein
+                        proteins.append(protein)
+
+                    if dummy in peptide_map:
+                        for peptide in peptide_map[dummy]:
+                            protein.add_match(peptide, start, end, hit_sequence, matched_l_eq_i_positions)
+                            if peptide.get_sequence() in sequence_set:
+                                sequence_set.remove(peptide.get_sequence())
 
         last_peptides = [pep for pep in peptides if not pep.get_sequence() in sequence_set]
 
@@ -452,18 +558,17 @@ class Protein:
         for peptide in last_peptides:
             peptide.get_distinguishable_peptides().clear()
 
+        distinguishable_map: dict[tuple[str, str], Peptide] = {}
         for protein in proteins:
             for match in protein.get_peptide_matches():
                 peptide = match.get_peptide()
                 sequence = peptide.get_sequence()
                 hit_sequence = match.get_hit_sequence()
                 if sequence != hit_sequence:
-                    distinguishable_peptide = None
-                    for tmp in peptide.get_distinguishable_peptides():
-                        if tmp.get_sequence() == hit_sequence:
-                            distinguishable_peptide = tmp
-                    if distinguishable_peptide is None:
+                    key = (peptide.get_id(), hit_sequence)
+                    if key not in distinguishable_map:
                         distinguishable_peptide = Peptide(protein.get_dataset(), hit_sequence)
+                        distinguishable_map[key] = distinguishable_peptide
                         peptide.get_distinguishable_peptides().append(distinguishable_peptide)
                         last_peptides.append(distinguishable_peptide)
 
@@ -501,12 +606,12 @@ class Protein:
 
                     isoform = Isoform()
                     isoform.set_protein(base_protein)
-                    base_protein.get_isoforms().append(isoform)
                     isoform.set_uniprot(protein.get_uniprot())
                     isoform.set_id(protein.get_id().replace('PRT', 'ISO'))
                     isoform.set_in_optimization_list(protein.get_uniprot() in optimized_set)
                     for match in protein.get_peptide_matches():
                         isoform.get_peptide_matches().append(match)
+                    base_protein.add_isoform(isoform)
                     isoforms.append(isoform)
 
         return new_proteins, isoforms
@@ -529,15 +634,16 @@ class Protein:
 
         pep_set_by_u = {}
         for p in proteins:
-            uniprot = p.get_uniprot()
-            peps = p.search_peptides()
-            pep_set_by_u[uniprot] = frozenset(peptide.get_dummy() for peptide in peps)
+            pep_set_by_u[p.get_uniprot()] = p.get_peptide_ids()
 
         leading_items = [(u, pep_set_by_u[u]) for u in pep_set_by_u.keys() if leading_flag[u]]
 
         exact_map = defaultdict(list)  # frozenset -> [uniprot,...]
-        for u, s in leading_items:
+        postings = defaultdict(list)   # peptide id -> [index in leading_items,...]
+        for i, (u, s) in enumerate(leading_items):
             exact_map[s].append(u)
+            for peptide_id in s:
+                postings[peptide_id].append(i)
 
         for p in proteins:
             if not p.is_leading():
@@ -553,7 +659,10 @@ class Protein:
                             has_same = True
 
                     if not has_same:
-                        for lead_u, L in leading_items:
+                        # every superset of S contains S's rarest peptide
+                        rarest = min(S, key=lambda peptide_id: len(postings.get(peptide_id, ())))
+                        for i in postings.get(rarest, ()):
+                            lead_u, L = leading_items[i]
                             if len(S) <= len(L) and S.issubset(L):
                                 p.set_subset(True)
                                 leading_list = p.get_leading_proteins()
@@ -595,119 +704,428 @@ class Protein:
 
 
     @staticmethod    
-    def optimize(proteins: list[Protein]) -> list[Protein]:
+    def optimize(proteins: list[Protein], stats: list[dict] | None = None) -> list[Protein]:
         load_dotenv()
         protein_parameter = int(os.getenv('PROTEIN_PARAMETER', '5000'))
         peptide_parameter = int(os.getenv('PEPTIDE_PARAMETER', '10000'))    
+        workers = int(os.getenv('OPTIMIZER_WORKERS', str(os.cpu_count() or 1)))
+        batch_proteins = min(protein_parameter, int(os.getenv('OPTIMIZER_BATCH_PROTEINS', '1000')))
+
+        cover_sets = Protein.create_cover_sets(proteins)
+        forced_ids, cover_sets = Protein.reduce_set_cover(cover_sets)
+        components = Protein.find_components(cover_sets)
+
+        selected_ids = set(forced_ids)
+        ilp_count = 0
+        greedy_count = 0
+
+        # Small components are packed into one ILP up to OPTIMIZER_BATCH_PROTEINS, which keeps
+        # the problem block-diagonal (still exact) without starting the solver per component.
+        tasks: list[tuple[str, dict[str, set]]] = []
+        batch: dict[str, set] = {}
+        batch_peptide_count = 0
+        for component in components:
+            peptide_count = 0
+            for peptide_set in component.values():
+                peptide_count += len(peptide_set)
+
+            if len(component) == 1:
+                selected_ids.update(component.keys())
+            elif len(component) > protein_parameter or peptide_count > peptide_parameter:
+                tasks.append(('greedy', component))
+                greedy_count += 1
+            else:
+                if len(batch) + len(component) > batch_proteins or batch_peptide_count + peptide_count > peptide_parameter:
+                    if len(batch) > 0:
+                        tasks.append(('ilp', batch))
+                    batch = {}
+                    batch_peptide_count = 0
+                batch.update(component)
+                batch_peptide_count += peptide_count
+                ilp_count += 1
+
+        if len(batch) > 0:
+            tasks.append(('ilp', batch))
+
+        largest = max((len(component) for component in components), default=0)
+        logger.info(f'Optimization components: {len(components)} (ILP: {ilp_count}, greedy: {greedy_count}, largest: {largest} proteins), solver tasks: {len(tasks)}')
+
+        results: list[tuple[list[str], dict]] = []
+        if workers > 1 and len(tasks) > 1:
+            with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as executor:
+                futures = [executor.submit(Protein.solve_component, method, task_sets) for method, task_sets in tasks]
+                for future in futures:
+                    results.append(future.result())
+        else:
+            for method, task_sets in tasks:
+                results.append(Protein.solve_component(method, task_sets))
+
+        for selected, task_stats in results:
+            selected_ids.update(selected)
+            if task_stats.get('fallback'):
+                logger.warning(f'ILP returned no usable solution ({task_stats["status"]}), using the greedy incumbent for {task_stats["proteins"]} proteins')
+            if stats is not None:
+                stats.append(task_stats)
 
-        peptide_count = 0
+        optimized_proteins = []
         for protein in proteins:
-            peptide_count += len(protein.get_peptide_matches())
-    
-        optimized_proteins = None
-        if len(proteins) > protein_parameter or peptide_count > peptide_parameter:
-            optimized_proteins = Protein.solve_set_cover_by_greedy(proteins)
-        else:
-            optimized_proteins = Protein.solve_set_cover_by_ilp(proteins)
+            uniprot_id = protein.get_uniprot()
+            if uniprot_id in selected_ids:
+                optimized_proteins.append(protein)
+                selected_ids.remove(uniprot_id)
 
         return optimized_proteins
 
 
     @staticmethod
-    def solve_set_cover_by_greedy(protein_list: list[Protein]) -> list[Protein]:
-        protein_to_peptides: dict[str, set] = {}
-        protein_lookup: dict[str, "Protein"] = {}
-        all_peptides: set = set()
-
-        for protein in protein_list:
-            uniprot_id = protein.get_uniprot()
+    def create_cover_sets(proteins: list[Protein]) -> dict[str, set]:
+        cover_sets: dict[str, set] = {}
+        for protein in proteins:
             peptide_set = {match.get_peptide().get_dummy() for match in protein.get_peptide_matches()}
             if len(peptide_set) > 0:
-                protein_to_peptides[uniprot_id] = peptide_set
-                protein_lookup[uniprot_id] = protein
-                all_peptides |= peptide_set
+                cover_sets[protein.get_uniprot()] = peptide_set
+        return cover_sets
+
+
+    @staticmethod
+    def create_peptide_index(cover_sets: dict[str, set]) -> dict[str, set]:
+        peptide_to_proteins: dict[str, set] = defaultdict(set)
+        for uniprot_id, peptide_set in cover_sets.items():
+            for peptide in peptide_set:
+                peptide_to_proteins[peptide].add(uniprot_id)
+        return peptide_to_proteins
+
+
+    @staticmethod
+    def reduce_set_cover(cover_sets: dict[str, set]) -> tuple[list[str], dict[str, set]]:
+        cover_sets = {uniprot_id: set(peptide_set) for uniprot_id, peptide_set in cover_sets.items()}
+        initial_protein_count = len(cover_sets)
+        initial_peptide_count = len(Protein.create_peptide_index(cover_sets))
+
+        forced_ids: list[str] = []
+        dominated_protein_count = 0
+        dominated_peptide_count = 0
+        rounds = 0
+
+        changed = True
+        while changed:
+            changed = False
+            rounds += 1
+
+            # A peptide found in a single protein forces that protein into the cover.
+            peptide_to_proteins = Protein.create_peptide_index(cover_sets)
+            covered = set()
+            for peptide, uniprot_ids in peptide_to_proteins.items():
+                if len(uniprot_ids) == 1:
+                    uniprot_id = next(iter(uniprot_ids))
+                    if uniprot_id in cover_sets:
+                        forced_ids.append(uniprot_id)
+                        covered |= cover_sets.pop(uniprot_id)
+            if len(covered) > 0:
+                changed = True
+                for uniprot_id in list(cover_sets.keys()):
+                    peptide_set = cover_sets[uniprot_id] - covered
+                    if len(peptide_set) > 0:
+                        cover_sets[uniprot_id] = peptide_set
+                    else:
+                        del cover_sets[uniprot_id]
+                peptide_to_proteins = Protein.create_peptide_index(cover_sets)
+
+            # A protein whose peptides are all in another protein is never needed.
+            # Of two identical proteins a canonical one is kept over an isoform, then the first one.
+            protein_order = {uniprot_id: ('-' in uniprot_id, i) for i, uniprot_id in enumerate(cover_sets.keys())}
+            dominated_proteins = set()
+            for uniprot_id, peptide_set in cover_sets.items():
+                rarest = min(peptide_set, key=lambda peptide: len(peptide_to_proteins[peptide]))
+                for other_id in peptide_to_proteins[rarest]:
+                    if other_id == uniprot_id or other_id in dominated_proteins:
+                        continue
+                    other_set = cover_sets[other_id]
+                    if peptide_set <= other_set and (len(peptide_set) < len(other_set) or protein_order[other_id] < protein_order[uniprot_id]):
+                        dominated_proteins.add(uniprot_id)
+                        break
+            if len(dominated_proteins) > 0:
+                changed = True
+                dominated_protein_count += len(dominated_proteins)
+                for uniprot_id in dominated_proteins:
+                    del cover_sets[uniprot_id]
+                peptide_to_proteins = Protein.create_peptide_index(cover_sets)
+
+            # A peptide whose proteins include all proteins of another peptide is covered
+            # whenever that peptide is. Of two identical peptides the first one is kept.
+            peptide_order = sorted(peptide_to_proteins.keys())
+            peptide_position = {peptide: i for i, peptide in enumerate(peptide_order)}
+            dominated_peptides = set()
+            for peptide in peptide_order:
+                uniprot_ids = peptide_to_proteins[peptide]
+                candidates = set()
+                for uniprot_id in uniprot_ids:
+                    candidates |= cover_sets[uniprot_id]
+                for other in candidates:
+                    if other == peptide or other in dominated_peptides:
+                        continue
+                    other_ids = peptide_to_proteins[other]
+                    if other_ids <= uniprot_ids and (len(other_ids) < len(uniprot_ids) or peptide_position[other] < peptide_position[peptide]):
+                        dominated_peptides.add(peptide)
+                        break
+            if len(dominated_peptides) > 0:
+                changed = True
+                dominated_peptide_count += len(dominated_peptides)
+                for uniprot_id in list(cover_sets.keys()):
+                    peptide_set = cover_sets[uniprot_id] - dominated_peptides
+                    if len(peptide_set) > 0:
+                        cover_sets[uniprot_id] = peptide_set
+                    else:
+                        del cover_sets[uniprot_id]
+
+        remaining_peptide_count = len(Protein.create_peptide_index(cover_sets))
+        logger.info(
+            f'Set-cover reduction ({rounds} rounds): '
+            f'proteins {initial_protein_count} -> {len(cover_sets)} '
+            f'(forced: {len(forced_ids)}, dominated: {dominated_protein_count}), '
+            f'peptides {initial_peptide_count} -> {remaining_peptide_count} '
+            f'(dominated: {dominated_peptide_count})'
+        )
+        return forced_ids, cover_sets
+
+
+    @staticmethod
+    def find_components(cover_sets: dict[str, set]) -> list[dict[str, set]]:
+        uniprot_ids = list(cover_sets.keys())
+
+        parents = list(range(len(uniprot_ids)))
 
-        uncovered_peptides = set(all_peptides)
-        if len(uncovered_peptides) == 0:
-            return [], 0.0
+        def find(index: int) -> int:
+            while parents[index] != index:
+                parents[index] = parents[parents[index]]
+                index = parents[index]
+            return index
 
-        heap: list[tuple[int, int, str]] = []  # (-カバー数, 世代番号, uniprot_id)
-        current_generation = 0
-        coverage_count_cache: dict[str, int] = {}
+        peptide_owner: dict[str, int] = {}
+        for index, uniprot_id in enumerate(uniprot_ids):
+            for peptide in cover_sets[uniprot_id]:
+                owner = peptide_owner.setdefault(peptide, index)
+                root1 = find(owner)
+                root2 = find(index)
+                if root1 != root2:
+                    parents[max(root1, root2)] = min(root1, root2)
 
-        for uniprot_id, peptide_set in protein_to_peptides.items():
-            coverage_count = len(peptide_set)
-            if coverage_count > 0:
-                coverage_count_cache[uniprot_id] = coverage_count
-                heapq.heappush(heap, (-coverage_count, current_generation, uniprot_id))
+        components: dict[int, dict[str, set]] = defaultdict(dict)
+        for index, uniprot_id in enumerate(uniprot_ids):
+            components[find(index)][uniprot_id] = cover_sets[uniprot_id]
+        return list(components.values())
+
+
+    @staticmethod
+    def solve_component(method: str, cover_sets: dict[str, set]) -> tuple[list[str], dict]:
+        peptides = set()
+        for peptide_set in cover_sets.values():
+            peptides |= peptide_set
+        stats = {
+            'solver': method,
+            'proteins': len(cover_sets),
+            'peptides': len(peptides),
+            'status': '',
+            'objective': None,
+            'bound': None,
+            'gap': None,
+            'time': None,
+            'fallback': False,
+        }
+
+        started = time.time()
+        if method == 'ilp':
+            selected = Protein.solve_ilp(cover_sets, stats)
+        else:
+            selected = Protein.solve_greedy(cover_sets)
+            stats['status'] = 'Heuristic'
+            stats['objective'] = len(selected)
+            stats['time'] = time.time() - started
+        return selected, stats
+
+    @staticmethod
+    def solve_set_cover_by_greedy(protein_list: list[Protein]) -> list[Protein]:
+        protein_lookup = {protein.get_uniprot(): protein for protein in protein_list}
+        selected_uniprots = Protein.solve_greedy(Protein.create_cover_sets(protein_list))
+        return [protein_lookup[u] for u in selected_uniprots]
+
+    @staticmethod
+    def solve_greedy(cover_sets: dict[str, set]) -> list[str]:
+        # Peptides are numbered and each protein keeps an exact count of its uncovered
+        # peptides, updated through the peptide -> proteins index when a protein is selected.
+        # A popped entry whose count is still exact is the best candidate (counts only go
+        # down), so only entries that actually changed are pushed again. This picks the same
+        # protein as a full rescan: highest count, then smallest uniprot id.
+        uniprot_ids = list(cover_sets.keys())
+        protein_index = {uniprot_id: index for index, uniprot_id in enumerate(uniprot_ids)}
+        peptide_ids: dict[str, int] = {}
+        protein_peptides: list[array] = []
+        for uniprot_id in uniprot_ids:
+            protein_peptides.append(array('i', [peptide_ids.setdefault(peptide, len(peptide_ids)) for peptide in cover_sets[uniprot_id]]))
+
+        uncovered_count = len(peptide_ids)
+        if uncovered_count == 0:
+            return []
+
+        peptide_proteins: list[list[int]] = [[] for _ in range(uncovered_count)]
+        for index, peptides in enumerate(protein_peptides):
+            for peptide_id in peptides:
+                peptide_proteins[peptide_id].append(index)
+
+        remaining = [len(peptides) for peptides in protein_peptides]
+        covered = bytearray(uncovered_count)
+
+        heap: list[tuple[int, str]] = [(-remaining[index], uniprot_id) for index, uniprot_id in enumerate(uniprot_ids)]  # (-カバー数, uniprot_id)
+        heapq.heapify(heap)
 
         selected_uniprots: list[str] = []
-        total_cost = 0.0
 
-        while len(uncovered_peptides) > 0 and len(heap) > 0:
-            neg_coverage, generation, candidate_uniprot = heapq.heappop(heap)
+        while uncovered_count > 0 and len(heap) > 0:
+            neg_coverage, candidate_uniprot = heapq.heappop(heap)
+            index = protein_index[candidate_uniprot]
 
-            recalculated_coverage = len(protein_to_peptides[candidate_uniprot] & uncovered_peptides)
-            is_generation_outdated = generation != current_generation
+            recalculated_coverage = remaining[index]
+            is_outdated = recalculated_coverage != -neg_coverage
             is_candidate_useful = recalculated_coverage > 0
 
-            if is_generation_outdated and is_candidate_useful:
-                coverage_count_cache[candidate_uniprot] = recalculated_coverage
-                heapq.heappush(heap, (-recalculated_coverage, current_generation, candidate_uniprot))
+            if is_outdated and is_candidate_useful:
+                heapq.heappush(heap, (-recalculated_coverage, candidate_uniprot))
             elif is_candidate_useful:
                 selected_uniprots.append(candidate_uniprot)
-                total_cost += 1.0
-                newly_covered_peptides = protein_to_peptides[candidate_uniprot] & uncovered_peptides
-                uncovered_peptides -= newly_covered_peptides
-                current_generation += 1
+                for peptide_id in protein_peptides[index]:
+                    if not covered[peptide_id]:
+                        covered[peptide_id] = 1
+                        uncovered_count -= 1
+                        for other in peptide_proteins[peptide_id]:
+                            remaining[other] -= 1
 
-        selected_proteins = [protein_lookup[u] for u in selected_uniprots]
-        return selected_proteins
+        return selected_uniprots
 
     @staticmethod
     def solve_set_cover_by_ilp(protein_list: list[Protein]) -> list[Protein]:
-        protein_to_peptides: dict[str, set] = {}
-        protein_lookup: dict[str, "Protein"] = {}
-        all_peptides: set = set()
+        protein_lookup = {protein.get_uniprot(): protein for protein in protein_list}
+        selected_uniprots = Protein.solve_ilp(Protein.create_cover_sets(protein_list))
+        return [protein_lookup[u] for u in selected_uniprots]
 
-        for protein in protein_list:
-            uniprot_id = protein.get_uniprot()
-            peptide_set = {match.get_peptide().get_dummy() for match in protein.get_peptide_matches()}
-            if len(peptide_set) > 0:
-                protein_to_peptides[uniprot_id] = peptide_set
-                protein_lookup[uniprot_id] = protein
-                all_peptides |= peptide_set
+    @staticmethod
+    def solve_ilp(cover_sets: dict[str, set], stats: dict | None = None) -> list[str]:
+        all_peptides: set = set()
+        for peptide_set in cover_sets.values():
+            all_peptides |= peptide_set
 
         if len(all_peptides) == 0:
             return []
 
+        peptide_to_proteins: dict[str, list[str]] = defaultdict(list)
+        for uniprot_id, peptides in cover_sets.items():
+            for peptide in peptides:
+                peptide_to_proteins[peptide].append(uniprot_id)
+
         prob = pulp.LpProblem("Set_Cover_Problem", pulp.LpMinimize)
 
         protein_vars: dict[str, pulp.LpVariable] = {}
-        for uniprot_id in protein_to_peptides.keys():
+        for uniprot_id in cover_sets.keys():
             var = pulp.LpVariable(f'P_{uniprot_id}', cat='Binary')
             protein_vars[uniprot_id] = var
 
         prob += pulp.lpSum(protein_vars.values()), "Total_Proteins_Selected"
 
+        incumbent = None
+        if len(cover_sets) >= Protein.ILP_WARM_START_PROTEINS:
+            incumbent = Protein.solve_greedy(cover_sets)
+            incumbent_set = set(incumbent)
+            for uniprot_id, var in protein_vars.items():
+                var.setInitialValue(1 if uniprot_id in incumbent_set else 0)
+
         for peptide in all_peptides:
             prob += (
-                pulp.lpSum(
-                    protein_vars[uniprot_id]
-                    for uniprot_id, peptides in protein_to_peptides.items()
-                    if peptide in peptides
-                ) >= 1,
+                pulp.lpSum(protein_vars[uniprot_id] for uniprot_id in peptide_to_proteins[peptide]) >= 1,
                 f"Cover_Peptide_{peptide}"
             )
 
-        prob.solve(pulp.PULP_CBC_CMD(msg=False))
+        Protein.export_ilp(prob, next(iter(protein_vars.keys())))
+
+        time_limit = float(os.getenv('ILP_TIME_LIMIT', '0'))
+        gap_rel = float(os.getenv('ILP_GAP_REL', '0'))
+        with tempfile.TemporaryDirectory() as log_dir:
+            log_path = os.path.join(log_dir, 'cbc.log')
+            solver = pulp.PULP_CBC_CMD(
+                msg=False,
+                warmStart=incumbent is not None,
+                timeLimit=time_limit if time_limit > 0 else None,
+                gapRel=gap_rel if gap_rel > 0 else None,
+                logPath=log_path
+            )
+            prob.solve(solver)
+            log = Path(log_path).read_text(errors='replace') if os.path.exists(log_path) else ''
+
+        selected = [uniprot_id for uniprot_id, var in protein_vars.items() if var.varValue is not None and var.varValue > 0.5]
+        covered = set()
+        for uniprot_id in selected:
+            covered |= cover_sets[uniprot_id]
+
+        fallback = prob.sol_status not in (pulp.LpSolutionOptimal, pulp.LpSolutionIntegerFeasible) or covered != all_peptides
+        if fallback:
+            selected = incumbent if incumbent is not None else Protein.solve_greedy(cover_sets)
+
+        if stats is not None:
+            result = Protein.parse_cbc_log(log)
+            stats['status'] = pulp.LpSolution[prob.sol_status]
+            stats['objective'] = len(selected)
+            stats['bound'] = result.get('bound')
+            stats['gap'] = result.get('gap')
+            if prob.sol_status == pulp.LpSolutionOptimal and not fallback:
+                stats['bound'] = stats['bound'] if stats['bound'] is not None else float(len(selected))
+                stats['gap'] = stats['gap'] if stats['gap'] is not None else 0.0
+            stats['time'] = prob.solutionTime
+            stats['fallback'] = fallback
+
+        return selected
 
-        selected_proteins = [
-            protein_lookup[uniprot_id]
-            for uniprot_id, var in protein_vars.items()
-            if var.varValue == 1.0
-        ]
+    @staticmethod
+    def parse_cbc_log(log: str) -> dict:
+        result = {}
+        for line in log.splitlines():
+            if line.startswith('Lower bound:'):
+                key = 'bound'
+            elif line.startswith('Gap:'):
+                key = 'gap'
+            else:
+                continue
+            try:
+                result[key] = float(line.split(':', 1)[1].strip())
+            except ValueError:
+                pass
+        return result
 
-        return selected_proteins
+    @staticmethod
+    def save_optimization_stats(f, stats: list[dict]) -> None:
+        headers = ['Solver', 'Proteins', 'Peptides', 'Status', 'Objective', 'Bound', 'Gap', 'Time', 'Fallback']
+        f.write('\t'.join(headers) + '\n')
+        for task_stats in stats:
+            row = [
+                task_stats['solver'],
+                task_stats['proteins'],
+                task_stats['peptides'],
+                task_stats['status'],
+                task_stats['objective'],
+                task_stats['bound'],
+                task_stats['gap'],
+                f'{task_stats["time"]:.3f}' if task_stats['time'] is not None else None,
+                task_stats['fallback'],
+            ]
+            f.write('\t'.join('' if col is None else str(col) for col in row) + '\n')
 
-  
\ No newline at end of file
+    @staticmethod
+    def export_ilp(prob: pulp.LpProblem, name: str) -> None:
+        export_dir = os.getenv('ILP_EXPORT_DIR')
+        if not export_dir:
+            return
+
+        export_format = os.getenv('ILP_EXPORT_FORMAT', 'mps').lower()
+        path = Path(export_dir)
+        path.mkdir(parents=True, exist_ok=True)
+        if export_format == 'lp':
+            prob.writeLP(str(path / f'set_cover_{name}.lp'))
+        else:
+            prob.writeMPS(str(path / f'set_cover_{name}.mps'))
@@ -1,8 +1,9 @@
 from __future__ import annotations
 
+from array import array
 from dataclasses import dataclass, field
 from tokenize import String
-from typing import ClassVar
+from typing import ClassVar, Iterator
 
 from typing import TYPE_CHECKING
 
@@ -42,210 +43,331 @@ class PsmModification:
         return self.position
 
 
-@dataclass
-class Psm:
-    dataset: DataSet
-    peptide: Peptide | None = None
-    sequence: str | None = None
-    id: str | None = None
-    title: str | None = None
-    properties: dict = field(default_factory=dict)
-    obs_mz: str | None = None
-    calc_mz: str | None = None
-    charge: str | None = None
-    jpost_score: str | None = None
-    mod: str | None = None
-    mod_detail: str | None = None
-    rt: str | None = None
-    score_map: dict = field(default_factory=dict)
-    fdr: float = 0.0
-    raw_file: str | None = None
-    scan: str | None = None
-    phospho_confirmed: str | None = None
-    phospho_ambiguous: list[str] = field(default_factory=list)
-    representative: bool = False
-    spectrum: Spectrum | None = None
-    modifications: list[PsmModification] = field(default_factory=list)
+class InternColumn:
+    def __init__(self):
+        self.values = []
+        self.value_map = {}
+        self.codes = array('i')
+
+    def intern(self, value) -> int:
+        code = self.value_map.get(value)
+        if code is None:
+            code = len(self.values)
+            self.values.append(value)
+            self.value_map[value] = code
+        return code
+
+    def append(self, value) -> None:
+        self.codes.append(self.intern(value))
+
+    def __contains__(self, value) -> bool:
+        return value in self.value_map
+
+    def get(self, index: int):
+        return self.values[self.codes[index]]
+
+    def set(self, index: int, value) -> None:
+        self.codes[index] = self.intern(value)
+
+
+class NumberColumn:
+    FLOAT = 0
+    INTEGER = 1
+    TEXT = 2
+
+    def __init__(self):
+        self.numbers = array('d')
+        self.formats = bytearray()
+        self.texts = {}
+
+    def append(self, value: str | None) -> None:
+        self.numbers.append(0.0)
+        self.formats.append(NumberColumn.TEXT)
+        self.set(len(self.numbers) - 1, value)
+
+    def get(self, index: int) -> str | None:
+        format = self.formats[index]
+        if format == NumberColumn.INTEGER:
+            return str(int(self.numbers[index]))
+        if format == NumberColumn.FLOAT:
+            return str(self.numbers[index])
+        return self.texts.get(index)
+
+    def set(self, index: int, value: str | None) -> None:
+        self.texts.pop(index, None)
+        format = NumberColumn.TEXT
+        if isinstance(value, str):
+            try:
+                number = int(value)
+                if str(number) == value and abs(number) < 2 ** 53:
+                    format = NumberColumn.INTEGER
+            except ValueError:
+                try:
+                    number = float(value)
+                    if str(number) == value:
+                        format = NumberColumn.FLOAT
+                except ValueError:
+                    pass
 
-    counter: ClassVar[int] = 0
+        self.formats[index] = format
+        if format == NumberColumn.TEXT:
+            self.numbers[index] = 0.0
+            if value is not None:
+                self.texts[index] = value
+        else:
+            self.numbers[index] = number
 
-    def __init__(self, dataset: DataSet):
-        Psm.counter += 1
 
-        self.dataset = dataset
-        self.id = f'PSM{dataset.get_number()}_{Psm.counter}'
-        self.properties = {}
-        self.representative = False
-        self.score_map = {}
-        self.phospho_ambiguous = []
-        self.modifications = []
+class Psm:
+    __slots__ = ('table', 'index')
 
+    counter: ClassVar[int] = 0
+
+    def __init__(self, table: PsmTable, index: int):
+        self.table = table
+        self.index = index
 
     def get_dataset(self) -> DataSet:
-        return self.dataset
+        return self.table.dataset
     
     def get_peptide(self) -> Peptide | None:
-        return self.peptide
-    
-    def set_peptide(self, peptide: Peptide) -> None:
-        self.peptide = peptide
+        return self.table.peptides[self.index]
 
     def get_sequence(self) -> str | None:
-        return self.sequence
-    
-    def set_sequence(self, sequence: str) -> None:
-        self.sequence = sequence
+        return self.get_peptide().get_sequence()
 
     def get_id(self) -> str | None:
-        return self.id
+        return self.table.get_id(self.index)
     
     def get_title(self) -> str | None:
-        return self.title
-    
-    def set_title(self, title: str) -> None:
-        self.title = title
-        self.set_properties(title)
+        return self.table.titles.get(self.index)
 
     def get_obs_mz(self) -> str | None:
-        return self.obs_mz
-    
-    def set_obs_mz(self, obs_mz: str) -> None:
-        self.obs_mz = obs_mz
+        return self.table.obs_mzs.get(self.index)
 
-    def get_calc_mz(self) -> str | None:
-        return self.calc_mz
-    
-    def set_calc_mz(self, calc_mz: str) -> None:
-        self.calc_mz = calc_mz
+    def get_calc_mz(self) -> float | None:
+        return self.table.calc_mzs[self.index]
 
     def get_charge(self) -> str | None:
-        return self.charge
-
-    def set_charge(self, charge: str) -> None:
-        self.charge = charge
+        return self.table.charges.get(self.index)
 
     def get_jpost_score(self) -> str | None:
-        return self.jpost_score
-    
-    def set_jpost_score(self, jpost_score: str) -> None:
-        self.jpost_score = jpost_score
+        return self.table.jpost_scores.get(self.index)
 
     def get_mod(self) -> str | None:
-        return self.mod
-    
-    def set_mod(self, mod: str | None) -> None:
-        self.mod = mod
+        return self.table.mods.get(self.index)
 
     def get_mod_detail(self) -> str | None:
-        return self.mod_detail
-    
-    def set_mod_detail(self, mod_detail: str | None) -> None:
-        self.mod_detail = mod_detail
+        return self.table.mod_details.get(self.index)
 
     def get_rt(self) -> str | None:
-        return self.rt
-
-    def set_rt(self, rt: str | None) -> None:
-        self.rt = rt
+        return self.table.rts.get(self.index)
 
     def get_score_map(self) -> dict:
-        return self.score_map
-
-    def set_score_map(self, score_map: dict) -> None:
-        self.score_map = score_map
+        return self.table.get_score_map(self.index)
 
     def get_property(self, key: str) -> str | None:
-        return self.properties.get(key)
-
-    def set_property(self, key: str, value: str) -> None:
-        self.properties[key] = value
+        properties = {}
+        title = self.get_title()
+        if title is not None:
+            for item in title.split(','):
+                if ':' in item:
+                    index = item.index(':')
+                    if index > 0:
+                        properties[item[:index].strip()] = item[index + 1:].strip()
+        return properties.get(key)
 
     def get_fdr(self) -> float:
-        return self.fdr
-    
-    def set_fdr(self, fdr: float) -> None:
-        self.fdr = fdr
+        return self.get_peptide().get_fdr()
 
     def get_raw_file(self) -> str | None:
-        return self.raw_file
-    
-    def set_raw_file(self, raw_file: str) -> None:
-        self.raw_file = raw_file
+        return self.table.raw_files.get(self.index)
 
     def get_scan(self) -> str | None:
-        return self.scan
-    
-    def set_scan(self, scan: str) -> None:
-        self.scan = scan
+        return self.table.scans.get(self.index)
 
     def is_representative(self) -> bool:
-        return self.representative
+        return self.index in self.table.representative
     
     def set_representative(self, representative: bool) -> None:
-        self.representative = representative
+        if representative:
+            self.table.representative.add(self.index)
+        else:
+            self.table.representative.discard(self.index)
 
     def get_phospho_confirmed(self) -> str | None:
-        return self.phospho_confirmed
-
-    def set_phospho_confirmed(self, phospho_confirmed: str) -> None:
-        self.phospho_confirmed = phospho_confirmed
+        return self.table.phospho_confirmed.get(self.index)
 
     def get_phospho_ambiguous(self) -> list[str]:
-        return self.phospho_ambiguous
-    
-    def add_phospho_ambiguous(self, phospho_ambiguous: str) -> None:
-        self.phospho_ambiguous.append(phospho_ambiguous)
+        return list(self.table.phospho_ambiguous.get(self.index))
 
-    def get_spectrum(self) -> Spectrum | None:
-        return self.spectrum
+    def get_spectrum_id(self) -> str | None:
+        return self.table.spectrum_ids.get(self.index)
 
-    def set_spectrum(self, spectrum: Spectrum) -> None:
-        self.spectrum = spectrum
+    def set_spectrum_id(self, spectrum_id: str) -> None:
+        self.table.spectrum_ids.set(self.index, spectrum_id)
 
     def get_modifications(self) -> list[PsmModification]:
-        return self.modifications
+        return list(self.table.modifications[self.index])
 
-    def set_properties(self, title: str) -> None:
-        items = title.split(',')
-        for item in items:
-            if ':' in item:
-                index = item.index(':')
-                if index > 0:
-                    key = item[:index].strip()
-                    value = item[index + 1:].strip()
-                    self.set_property(key, value)
+    def to_ttl(self, f) -> list[str]:
+        return self.table.write_psm(f, self.index)
 
+    @staticmethod
+    def get_psms(peptides: list[Peptide]) -> tuple[PsmTable, list[Spectrum]]:
+        spectra = Psm.collect_psms(peptides)
+        psms = peptides[0].get_dataset().get_psm_table() if len(peptides) > 0 else None
+        return psms, spectra
 
-    def to_ttl(self, f) -> list[str]:
-        self.modifications = []
-        f.write(f':{self.id} \n')
-        f.write(f'    dct:identifier "{self.id}" ;\n')
+    @staticmethod
+    def collect_psms(peptides: list[Peptide]) -> list[Spectrum]:
+        '''Links the PSMs of `peptides` to their spectra and returns the spectra not seen in earlier calls.'''
+        spectra = []
+        if len(peptides) == 0:
+            return spectra
+        dataset = peptides[0].get_dataset()
+        rawdata_list = dataset.get_rawdata_list()
+        table = dataset.get_psm_table()
 
-        if self.is_representative():
-            f.write(f'    jpost:representativePsm 1 ;\n')
-        
-        if self.spectrum is not None:
-            f.write(f'    jpost:hasSpectrum bid:{self.spectrum.get_id()} ;\n')
+        for peptide in peptides:
+            for index in peptide.get_psm_indices():
+                rawdata = rawdata_list.get_rawdata(table.raw_files.get(index))
+                scan = table.scans.get(index)
+                spectrum_id = f'{rawdata.get_id().replace("RAW", "SPC")}_{scan}'
+                if spectrum_id not in table.spectrum_ids:
+                    spectra.append(Spectrum(rawdata, scan))
+                table.spectrum_ids.set(index, spectrum_id)
+        return spectra
 
-        f.write('    sio:SIO_000216 [\n')
-        f.write('        a jpost:UniScore ;\n')
-        f.write(f'        sio:SIO_000300 {self.get_jpost_score()} ;\n')
-        f.write('    ] ;\n')
+    @staticmethod
+    def save_modifications(f, psms: PsmTable) -> None:
+        headers = ['Peptide ID', 'Modification', 'Site', 'Position']
+        f.write('\t'.join(headers) + '\n')
 
-        modifications = []
-        mod_set = set()
-        mod_set21 = set()
-        not_found = []
+        lines = []
+        for index in range(len(psms)):
+            peptide = psms.peptides[index]
+            for psm_modification in psms.modifications[index]:
+                modification = psm_modification.get_modification()
+                site = psm_modification.get_site()
+                position = psm_modification.get_position()
+                if modification is not None:
+                    row = f'{peptide.get_id()}\t{modification.get_title()}\t{site}\t{position}'
+                    lines.append(row)
+
+        for line in sorted(lines):
+            f.write(f'{line}\n')
+
+
+class PsmTable:
+    def __init__(self, dataset: DataSet):
+        self.dataset = dataset
+        dataset.set_psm_table(self)
+        self.numbers = array('q')
+        self.peptides: list[Peptide] = []
+        self.titles = InternColumn()
+        self.obs_mzs = NumberColumn()
+        self.calc_mzs = array('d')
+        self.charges = NumberColumn()
+        self.jpost_scores = NumberColumn()
+        self.mods = InternColumn()
+        self.mod_details = InternColumn()
+        self.rts = NumberColumn()
+        self.score_engines = InternColumn()
+        self.score_evs = NumberColumn()
+        self.score_values = NumberColumn()
+        self.raw_files = InternColumn()
+        self.scans = NumberColumn()
+        self.phospho_confirmed = InternColumn()
+        self.phospho_ambiguous = InternColumn()
+        self.spectrum_ids = InternColumn()
+        self.modifications: list[tuple[PsmModification, ...]] = []
+        self.representative: set[int] = set()
+        self.mod_site_maps: dict[str, dict[str, str]] = {}
+        self.modification_map: dict[str, Modification] | None = None
+
+    def __len__(self) -> int:
+        return len(self.numbers)
+
+    def __iter__(self) -> Iterator[Psm]:
+        for index in range(len(self.numbers)):
+            yield Psm(self, index)
+
+    def get(self, index: int) -> Psm:
+        return Psm(self, index)
+
+    def get_dataset(self) -> DataSet:
+        return self.dataset
 
-        dataset = self.get_dataset()
-        enzyme = dataset.get_enzyme()
-        for mod in enzyme.get_fixed_mods():
-            modifications.append(mod)
-        for mod in enzyme.get_variable_mods():
-            modifications.append(mod)
+    def get_id(self, index: int) -> str:
+        return f'PSM{self.dataset.get_number()}_{self.numbers[index]}'
+
+    def get_score_map(self, index: int) -> dict:
+        engine = self.score_engines.get(index)
+        if engine is None:
+            return {}
+        return {'ev': self.score_evs.get(index), engine: self.score_values.get(index)}
+
+    def add_psm(
+            self,
+            peptide: Peptide,
+            title: str,
+            calc_mz: float,
+            mod: str,
+            mod_detail: str,
+            rt: str | None = None,
+            jpost_score: str | None = None,
+            obs_mz: str | None = None,
+            charge: str | None = None,
+            raw_file: str | None = None,
+            scan: str | None = None,
+            score_engine: str | None = None,
+            score_ev: str | None = None,
+            score_value: str | None = None,
+            phospho_confirmed: str | None = None,
+            phospho_ambiguous: tuple[str, ...] = ()
+    ) -> int:
+        Psm.counter += 1
+        self.numbers.append(Psm.counter)
+        self.peptides.append(peptide)
+        self.titles.append(title)
+        self.calc_mzs.append(calc_mz)
+        self.mods.append(mod)
+        self.mod_details.append(mod_detail)
+        self.rts.append(rt)
+        self.jpost_scores.append(jpost_score)
+        self.obs_mzs.append(obs_mz)
+        self.charges.append(charge)
+        self.raw_files.append(raw_file)
+        self.scans.append(scan)
+        self.score_engines.append(score_engine)
+        self.score_evs.append(score_ev)
+        self.score_values.append(score_value)
+        self.phospho_confirmed.append(phospho_confirmed)
+        self.phospho_ambiguous.append(tuple(phospho_ambiguous))
+        self.spectrum_ids.append(None)
+        self.modifications.append(())
+        return len(self.numbers) - 1
+
+    def get_modification_map(self) -> dict[str, Modification]:
+        if self.modification_map is None:
+            enzyme = self.dataset.get_enzyme()
+            modifications = enzyme.get_fixed_mods() + enzyme.get_variable_mods()
+            # the last modification with a title wins, as in a linear scan of the list
+            self.modification_map = {modification.get_title(): modification for modification in modifications}
+        return self.modification_map
+
+    def get_mod_site_map(self, mod: str) -> dict[str, str]:
+        mod_map = self.mod_site_maps.get(mod)
+        if mod_map is None:
+            mod_map = PsmTable.parse_mod_sites(mod)
+            self.mod_site_maps[mod] = mod_map
+        return mod_map
 
+    @staticmethod
+    def parse_mod_sites(mods: str) -> dict[str, str]:
         mod_map = {}
-        tokens = self.get_mod().split(';')
+        tokens = mods.split(';')
         for token in tokens:
             mod = token
             spece_index = token.find(' ')
@@ -270,20 +392,54 @@ class Psm:
                 mod_site = mod_sites[0]
                 mod_map[mod_site] = mod
                 mod_sites = mod_sites[1:]
+        return mod_map
+
+    def to_ttl(self, f) -> list[str]:
+        not_found = []
+        for index in range(len(self.numbers)):
+            not_found.extend(self.write_psm(f, index))
+        return not_found
+
+
+    def write_psm(self, f, index: int) -> list[str]:
+        psm_id = self.get_id(index)
+        peptide = self.peptides[index]
+        spectrum_id = self.spectrum_ids.get(index)
+        psm_modifications = []
+        f.write(f':{psm_id} \n')
+        f.write(f'    dct:identifier "{psm_id}" ;\n')
+
+        if index in self.representative:
+            f.write(f'    jpost:representativePsm 1 ;\n')
+        
+        if spectrum_id is not None:
+            f.write(f'    jpost:hasSpectrum bid:{spectrum_id} ;\n')
+
+        f.write('    sio:SIO_000216 [\n')
+        f.write('        a jpost:UniScore ;\n')
+        f.write(f'        sio:SIO_000300 {self.jpost_scores.get(index)} ;\n')
+        f.write('    ] ;\n')
+
+        mod_set = set()
+        mod_set21 = set()
+        not_found = []
 
-        tokens = self.mod_detail.split(',')
+        modification_map = self.get_modification_map()
+        mod_map = self.get_mod_site_map(self.mods.get(index))
+
+        tokens = self.mod_details.get(index).split(',')
         for token in tokens:
             details = token
-            index = details.find(':')
+            index1 = details.find(':')
             position = None
             site = None
             mod = None
             
-            if index >= 0:
-                position = details[index + 1]
+            if index1 >= 0:
+                position = details[index1 + 1]
                 index2 = details.find('@')
-                if index2 >= 0 and index2 < index:
-                    site = details[index2 + 1: index]
+                if index2 >= 0 and index2 < index1:
+                    site = details[index2 + 1: index1]
                     mod = mod_map.get(site)
 
             mod_list = []
@@ -296,12 +452,9 @@ class Psm:
             for mod_element in mod_list:
                 mod_info = f'Mod:{mod_element}:{site}:{position}'
 
-                modification = None
-                for tmp in modifications:
-                    if tmp.get_title() == mod_element:
-                        modification = tmp
-                        if site is None:
-                            site = tmp.get_site()
+                modification = modification_map.get(mod_element)
+                if modification is not None and site is None:
+                    site = modification.get_site()
 
                 if mod_info not in mod_set:
                     mod_set.add(mod_info)
@@ -313,7 +466,7 @@ class Psm:
                             mod_set21.add(mod_info21)
                         f.write(f'        a unimod:UNIMOD_{modification.get_unimod()}\n')
                         psm_modification = PsmModification(modification, site, position)
-                        self.modifications.append(psm_modification)
+                        psm_modifications.append(psm_modification)
                     else:
                         if mod_element not in not_found:
                             not_found.append(mod_element)                            
@@ -325,7 +478,7 @@ class Psm:
                     if position is not None:
                         f.write('        faldo:location [\n')
                         f.write('            a faldo:ExactPosition ;\n')
-                        f.write(f'            faldo:reference :{self.peptide.get_id()} ;\n')
+                        f.write(f'            faldo:reference :{peptide.get_id()} ;\n')
                         f.write(f'            faldo:position {position} ;\n')
                         f.write('        ] \n')
                     f.write('    ] ;\n')
@@ -333,26 +486,26 @@ class Psm:
         f.write('    sio:SIO_000216 [\n')
         f.write('        a jpost:ExperimentalMassToCharge ;\n')
         f.write('        sio:SIO_000221 obo:MS_1000040 ;\n')
-        f.write(f'        sio:SIO_000300 {self.get_obs_mz()};\n')
+        f.write(f'        sio:SIO_000300 {self.obs_mzs.get(index)};\n')
         f.write('   ] ;\n')
 
         f.write('    sio:SIO_000216 [\n')
         f.write('        a jpost:CalculatedMassToCharge ;\n')
         f.write('        sio:SIO_000221 obo:MS_1000040 ;\n')
-        f.write(f'        sio:SIO_000300 {self.get_calc_mz()};\n')
+        f.write(f'        sio:SIO_000300 {self.calc_mzs[index]};\n')
         f.write('   ] ;\n')
 
         f.write('    sio:SIO_000216 [\n')
         f.write('        sio:SIO_000221 obo:MS_1000041 ;\n')
-        f.write(f'        sio:SIO_000300 {self.get_charge()};\n')
+        f.write(f'        sio:SIO_000300 {self.charges.get(index)};\n')
         f.write('   ] ;\n')
 
         f.write('    sio:SIO_000216 [\n')
         f.write('        sio:SIO_000221 obo:MS_1000894 ;\n')
-        f.write(f'        sio:SIO_000300 {self.get_rt()};\n')
+        f.write(f'        sio:SIO_000300 {self.rts.get(index)};\n')
         f.write('   ] ;\n')
 
-        score_map = self.get_score_map()
+        score_map = self.get_score_map(index)
         ev = score_map.get('ev')
         score = None
         score_id = ''
@@ -388,15 +541,17 @@ class Psm:
                 f.write(f'        sio:SIO_000300 {ev}\n')
                 f.write('   ] ;\n')
 
-        self.write_phospho(f, mod_set21)
+        self.modifications[index] = tuple(psm_modifications)
+        self.write_phospho(f, index, mod_set21)
         f.write('    a jpost:Psm .\n\n')
         
         return not_found
 
 
-    def write_phospho(self, f, mod_set21) -> None:
+    def write_phospho(self, f, index: int, mod_set21) -> None:
+        peptide = self.peptides[index]
         not_found = []
-        confirmed = self.get_phospho_confirmed()
+        confirmed = self.phospho_confirmed.get(index)
         if is_not_empty(confirmed):
             array = confirmed.split('/')
             for element in array:
@@ -415,12 +570,12 @@ class Psm:
                     f.write(f'        jpost:modificationSite "{site}" ;\n')
                     f.write('        faldo:location [\n')
                     f.write('            a faldo:ExactPosition ;\n')
-                    f.write(f'            faldo:reference :{self.get_peptide().get_id()} ;\n')
+                    f.write(f'            faldo:reference :{peptide.get_id()} ;\n')
                     f.write(f'            faldo:position {pos} ;\n')
                     f.write('        ]\n')
                     f.write('    ] ;\n')
 
-        ambiguousList = self.get_phospho_ambiguous()
+        ambiguousList = self.phospho_ambiguous.get(index)
         for ambiguous in ambiguousList:
             if ambiguous is not None and ambiguous != '':
                 left_right = ambiguous.split('|')
@@ -454,7 +609,7 @@ class Psm:
                             f.write(f'            jpost:modificationSite "{site}" ;\n')
                             f.write('            faldo:location [\n')
                             f.write('                a faldo:ExactPosition ;\n')
-                            f.write(f'                faldo:reference :{self.get_peptide().get_id()} ;\n')
+                            f.write(f'                faldo:reference :{peptide.get_id()} ;\n')
                             f.write(f'                faldo:position {pos} ;\n')
                             f.write('            ]\n')
                             f.write('        ] ;\n')
@@ -484,7 +639,7 @@ class Psm:
                             if is_not_empty(pos):
                                 f.write("            faldo:possiblePosition [\n")
                                 f.write("                a faldo:ExactPosition ;\n")
-                                f.write(f"                faldo:reference :{self.get_peptide().get_id()} ;\n")
+                                f.write(f"                faldo:reference :{peptide.get_id()} ;\n")
                                 f.write(f"                faldo:position {pos} ;\n")
                                 f.write(f"                 jpost:modificationSite \"{site}\" ;\n")
                                 f.write("            ]\n")
@@ -494,53 +649,3 @@ class Psm:
                                 f.write("\n")
                     f.write("        ]\n")
                     f.write("    ] ;\n")
-
-
-
-
-    @staticmethod
-    def get_psms(peptides: list[Peptide]) -> tuple[list[Psm], list[Spectrum]]:
-        psms = []
-        spectra = []
-        spectra_map = {}
-        rawdata_list = peptides[0].get_dataset().get_rawdata_list()
-
-        for peptide in peptides:
-            for psm in peptide.get_psms():
-                psms.append(psm)
-                file = psm.get_raw_file()
-                rawdata = None
-                for tmp in rawdata_list.get_list():
-                    if rawdata is None or tmp.get_file() == file:
-                        rawdata = tmp
-            
-                spectrum_id = f'{rawdata.get_id().replace("RAW", "SPC")}_{psm.get_scan()}'
-                spectrum = None
-                if spectrum_id in spectra_map:
-                    spectrum = spectra_map[spectrum_id]
-                else:
-                    spectrum = Spectrum(rawdata, psm.get_scan())
-                    spectra_map[spectrum_id] = spectrum
-                    spectra.append(spectrum)
-                psm.set_spectrum(spectrum)
-
-        return psms, spectra
-    
-    @staticmethod
-    def save_modifications(f, psms: list[Psm]) -> None:
-        headers = ['Peptide ID', 'Modification', 'Site', 'Position']
-        f.write('\t'.join(headers) + '\n')
-
-        lines = []
-        for psm in psms:
-            peptide = psm.get_peptide()
-            for psm_modification in psm.get_modifications():
-                modification = psm_modification.get_modification()
-                site = psm_modification.get_site()
-                position = psm_modification.get_position()
-                if modification is not None:
-                    row = f'{peptide.get_id()}\t{modification.get_title()}\t{site}\t{position}'
-                    lines.append(row)
-
-        for line in sorted(lines):
-            f.write(f'{line}\n')
@@ -5,7 +5,7 @@ from dataclasses import dataclass, field
 from typing import Optional
 
 
-from xml.etree import ElementTree as ET
+from .metadata import MetadataDocument
 
 from typing import TYPE_CHECKING
 if TYPE_CHECKING:
@@ -32,12 +32,14 @@ class RawData:
 class RawDataList:
     dataset: DataSet
     files: list[RawData] = field(default_factory=list)
+    file_map: dict[str, RawData] = field(default_factory=dict)
     counter: int = 0
 
     def __init__(self, dataset: DataSet):
         self.dataset = dataset
         dataset.set_rawdata_list(self)
         self.files = []
+        self.file_map = {}
         self.counter = 0        
 
     
@@ -53,14 +55,19 @@ class RawDataList:
         
         rawdata = RawData(file, id)
         self.files.append(rawdata)
+        self.file_map[file] = rawdata
 
+    def get_rawdata(self, file: str) -> Optional[RawData]:
+        rawdata = self.file_map.get(file)
+        if rawdata is None and len(self.files) > 0:
+            rawdata = self.files[0]
+        return rawdata
 
     def get_file_id(self, file: str) -> Optional[str]:  
-        id = None
-        for rawdata in self.files:
-            if rawdata.get_file() == file:
-                id = rawdata.get_id()
-        return id
+        rawdata = self.file_map.get(file)
+        if rawdata is None:
+            return None
+        return rawdata.get_id()
         
     def __str__(self):
         return f'RawDataList(dataset={self.dataset.get_id()}, files={len(self.files)})'
@@ -79,26 +86,12 @@ class RawDataList:
         
 
     @staticmethod
-    def read_rawdata_list(dataset: DataSet, xml_path: str) -> RawDataList:
-        tree = ET.parse(xml_path)
-        root = tree.getroot()
+    def read_rawdata_list(dataset: DataSet, xml_path: str | MetadataDocument) -> RawDataList:
+        document = MetadataDocument.get_document(xml_path)
 
         rawdata_list = RawDataList(dataset)
 
-        files = root.findall('FileList/File')
-
-        for file in files:
-            name = None
-            type = None
-            
-            name_tag = file.find('Name')
-            if name_tag is not None:
-                name = name_tag.text
-
-            type_tag = file.find('Type')
-            if type_tag is not None:
-                type = type_tag.text
-
+        for name, type in document.get_files():
             if type is not None and type.lower() == 'raw':
                 rawdata_list.add_file(name)
 
@@ -2,7 +2,7 @@ from __future__ import annotations
 from dataclasses import dataclass, field
 from typing import Optional, List
 
-import xml.etree.ElementTree as ET
+from .metadata import MetadataDocument
 import logging
 
 from ..utils.string_tool import is_not_empty
@@ -153,9 +153,8 @@ class Sample:
         f.write('    a jpost:Sample .\n\n')        
 
     @staticmethod
-    def read_sample(dataset: DataSet, xml_file: str) -> Sample:        
-        tree = ET.parse(xml_file)
-        root = tree.getroot()
+    def read_sample(dataset: DataSet, xml_file: str | MetadataDocument) -> Sample:
+        root = MetadataDocument.get_document(xml_file).get_root()
 
         sample = Sample(dataset)
 
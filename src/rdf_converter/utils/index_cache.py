@@ -0,0 +1,186 @@
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import shutil
+import socket
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Iterator
+
+import psutil
+
+
+logger = logging.getLogger(__name__)
+
+
+def file_digest(path: str, chunk_size: int = 1024 * 1024) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def directory_size(path: Path) -> int:
+    size = 0
+    for file in path.rglob('*'):
+        if file.is_file():
+            size += file.stat().st_size
+    return size
+
+
+class FileLock:
+    def __init__(self, path: Path, timeout: float = 3600.0, stale: float = 6 * 3600.0):
+        self.path = path
+        self.timeout = timeout
+        self.stale = stale
+
+    def __enter__(self) -> FileLock:
+        started = time.time()
+        while True:
+            try:
+                fd = os.open(self.path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+                os.write(fd, str(os.getpid()).encode('ascii'))
+                os.close(fd)
+                return self
+            except FileExistsError:
+                try:
+                    if time.time() - self.path.stat().st_mtime > self.stale:
+                        logger.warning(f'Removing stale lock: {self.path}')
+                        self.path.unlink()
+                        continue
+                except FileNotFoundError:
+                    continue
+                if time.time() - started > self.timeout:
+                    raise TimeoutError(f'Could not acquire lock: {self.path}')
+                time.sleep(0.5)
+
+    def __exit__(self, *args) -> None:
+        try:
+            self.path.unlink()
+        except FileNotFoundError:
+            pass
+
+
+class IndexCache:
+    '''Shared store of PeptideMatch indexes, keyed by FASTA digest, jar digest and index flags.'''
+
+    COMPLETE_FILE = '.complete'
+    IN_USE = '.inuse-'
+    IN_USE_STALE = 24 * 3600.0
+
+    def __init__(self, cache_dir: str, max_bytes: int = 0):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+
+    def create_key(self, fasta_path: str, jar_path: str, args: list[str]) -> str:
+        digest = hashlib.sha256()
+        digest.update(file_digest(fasta_path).encode('ascii'))
+        if os.path.exists(jar_path):
+            digest.update(file_digest(jar_path).encode('ascii'))
+        else:
+            digest.update(jar_path.encode('utf-8'))
+        digest.update(' '.join(args).encode('utf-8'))
+        return digest.hexdigest()
+
+    def get_entry(self, key: str) -> Path | None:
+        entry = self.cache_dir / key
+        if (entry / IndexCache.COMPLETE_FILE).exists():
+            return entry
+        return None
+
+    def touch(self, entry: Path) -> None:
+        (entry / IndexCache.COMPLETE_FILE).touch()
+
+    def create_marker(self, key: str) -> Path:
+        marker = self.cache_dir / f'{key}{IndexCache.IN_USE}{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex}'
+        marker.touch()
+        return marker
+
+    def is_in_use(self, key: str) -> bool:
+        host_name = socket.gethostname()
+        for marker in self.cache_dir.glob(f'{key}{IndexCache.IN_USE}*'):
+            host, pid, _ = marker.name[len(key) + len(IndexCache.IN_USE):].rsplit('-', 2)
+            try:
+                if host == host_name:
+                    alive = psutil.pid_exists(int(pid))
+                else:
+                    alive = time.time() - marker.stat().st_mtime < IndexCache.IN_USE_STALE
+            except (OSError, ValueError):
+                continue
+            if alive:
+                return True
+            logger.warning(f'Removing stale in-use marker: {marker}')
+            marker.unlink(missing_ok=True)
+        return False
+
+    @contextmanager
+    def use(self, key: str, build: Callable[[Path], None]) -> Iterator[Path]:
+        '''Yields the entry for `key`, building it if needed; evict() leaves it alone until the block exits.'''
+        built = False
+        with FileLock(self.cache_dir / f'{key}.lock'):
+            entry = self.get_entry(key)
+            if entry is not None:
+                logger.info(f'Using cached PeptideMatch DB index: {entry}')
+                self.touch(entry)
+            else:
+                entry = self.build_entry(key, build)
+                built = True
+            marker = self.create_marker(key)
+
+        try:
+            if built:
+                self.evict(keep=key)
+            yield entry
+        finally:
+            marker.unlink(missing_ok=True)
+
+    def build_entry(self, key: str, build: Callable[[Path], None]) -> Path:
+        tmp_dir = self.cache_dir / f'{key}.tmp-{os.getpid()}'
+        if tmp_dir.exists():
+            shutil.rmtree(tmp_dir)
+        tmp_dir.mkdir()
+        try:
+            build(tmp_dir)
+            (tmp_dir / IndexCache.COMPLETE_FILE).touch()
+            entry = self.cache_dir / key
+            if entry.exists():
+                shutil.rmtree(entry)
+            os.replace(tmp_dir, entry)
+        except BaseException:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+        return entry
+
+    def evict(self, keep: str | None = None) -> None:
+        if self.max_bytes <= 0:
+            return
+
+        entries = []
+        for entry in self.cache_dir.iterdir():
+            complete_file = entry / IndexCache.COMPLETE_FILE
+            if entry.is_dir() and complete_file.exists():
+                entries.append((complete_file.stat().st_mtime, entry, directory_size(entry)))
+
+        total = sum(size for _, _, size in entries)
+        entries.sort(key=lambda x: x[0])
+        for _, entry, size in entries:
+            if total <= self.max_bytes:
+                break
+            if entry.name == keep:
+                continue
+            with FileLock(self.cache_dir / f'{entry.name}.lock'):
+                if self.is_in_use(entry.name):
+                    logger.info(f'Keeping PeptideMatch DB index in use: {entry}')
+                    continue
+                logger.info(f'Evicting PeptideMatch DB index: {entry}')
+                shutil.rmtree(entry, ignore_errors=True)
+            total -= size
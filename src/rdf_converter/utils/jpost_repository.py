@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import logging
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from typing import Iterator
+
+import requests
+
+
+logger = logging.getLogger(__name__)
+
+
+def find_result_file(content: bytes) -> str | None:
+    try:
+        root = ET.fromstring(content)
+    except ET.ParseError as e:
+        logger.warning(f'Project XML could not be parsed: {e}')
+        return None
+
+    result_file = None
+    for file_tag in root.findall('FileList/File'):
+        type = file_tag.find('Type').text
+        if type == 'result':
+            result_file = file_tag.find('Name').text
+    return result_file
+
+
+class RemoteRepository:
+    '''Project XMLs from the jPOST repository and result files from jPOST storage.'''
+
+    def __init__(self, repository_url: str, storage_url: str):
+        self.repository_url = repository_url
+        self.storage_url = storage_url
+
+    def get_result_url(self, project_id: str, result_file: str) -> str:
+        return f'{self.storage_url}{project_id}/{result_file}'
+
+    def get_result_file(self, project_id: str) -> str | None:
+        xml_url = f'{self.repository_url}{project_id}.0.xml'
+        response = requests.get(xml_url)
+        if response.status_code != 200:
+            logger.warning(f'Failed to get {xml_url}: {response.status_code}')
+            return None
+        return find_result_file(response.content)
+
+    def get_etag(self, project_id: str, result_file: str) -> str | None:
+        response = requests.head(self.get_result_url(project_id, result_file), allow_redirects=True)
+        if response.status_code != 200:
+            return None
+        return response.headers.get('ETag') or response.headers.get('Last-Modified')
+
+    def open_result(self, project_id: str, result_file: str) -> tuple[str | None, Iterator[str]] | None:
+        result_url = self.get_result_url(project_id, result_file)
+        response = requests.get(result_url, stream=True)
+        if response.status_code != 200:
+            logger.warning(f'Failed to get {result_url}: {response.status_code}')
+            response.close()
+            return None
+        etag = response.headers.get('ETag') or response.headers.get('Last-Modified')
+        return etag, RemoteRepository.read_lines(response)
+
+    @staticmethod
+    def read_lines(response: requests.Response, chunk_size: int = 64 * 1024) -> Iterator[str]:
+        # closing the generator drops the connection, so the rest of the body is never transferred
+        try:
+            for line in response.iter_lines(chunk_size=chunk_size):
+                yield line.decode('utf-8')
+        finally:
+            response.close()
+
+
+class LocalRepository:
+    '''Offline stand-in for RemoteRepository: `<dir>/<project>.0.xml` and `<dir>/<project>/<result file>`.'''
+
+    def __init__(self, directory: str):
+        self.directory = Path(directory)
+
+    def get_result_path(self, project_id: str, result_file: str) -> Path:
+        return self.directory / project_id / result_file
+
+    def get_result_file(self, project_id: str) -> str | None:
+        xml_path = self.directory / f'{project_id}.0.xml'
+        if not xml_path.exists():
+            logger.warning(f'Not found: {xml_path}')
+            return None
+        return find_result_file(xml_path.read_bytes())
+
+    def get_etag(self, project_id: str, result_file: str) -> str | None:
+        path = self.get_result_path(project_id, result_file)
+        if not path.exists():
+            return None
+        stat = path.stat()
+        return f'{stat.st_size:x}-{stat.st_mtime_ns:x}'
+
+    def open_result(self, project_id: str, result_file: str) -> tuple[str | None, Iterator[str]] | None:
+        path = self.get_result_path(project_id, result_file)
+        if not path.exists():
+            logger.warning(f'Not found: {path}')
+            return None
+        return self.get_etag(project_id, result_file), self.read_lines(path)
+
+    @staticmethod
+    def read_lines(path: Path) -> Iterator[str]:
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                yield line.rstrip('\r\n')
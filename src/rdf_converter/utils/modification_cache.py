@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Callable
+
+from .index_cache import FileLock
+
+
+logger = logging.getLogger(__name__)
+
+
+class ModificationCache:
+    '''Fixed/variable modification lists read from project result files, keyed by project ID.
+
+    An entry younger than `ttl` seconds is used as is. An older one is revalidated by comparing
+    the result file name and its ETag with the repository, and fetched again only when they differ.
+    '''
+
+    def __init__(self, cache_dir: str, ttl: float):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.ttl = ttl
+
+    def get_path(self, project_id: str) -> Path:
+        return self.cache_dir / f'{project_id}.json'
+
+    def load(self, project_id: str) -> dict | None:
+        path = self.get_path(project_id)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f'Ignoring broken modification cache {path}: {e}')
+            return None
+
+    def save(self, project_id: str, entry: dict) -> None:
+        path = self.get_path(project_id)
+        tmp_path = path.with_name(f'{path.name}.tmp-{os.getpid()}')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(entry, f, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, path)
+
+    def is_fresh(self, entry: dict | None) -> bool:
+        return entry is not None and time.time() - entry.get('fetched', 0) < self.ttl
+
+    def is_valid(self, entry: dict, project_id: str, repository) -> bool:
+        if entry.get('etag') is None:
+            return False
+        result_file = repository.get_result_file(project_id)
+        if result_file is None or result_file != entry.get('result_file'):
+            return False
+        return repository.get_etag(project_id, result_file) == entry['etag']
+
+    def get_or_fetch(self, project_id: str, repository, fetch: Callable[[object, str], dict | None]) -> dict | None:
+        entry = self.load(project_id)
+        if self.is_fresh(entry):
+            logger.info(f'Using cached modifications: {project_id}')
+            return entry
+
+        with FileLock(self.cache_dir / f'{project_id}.lock'):
+            entry = self.load(project_id)
+            if self.is_fresh(entry):
+                logger.info(f'Using cached modifications: {project_id}')
+                return entry
+
+            try:
+                if entry is not None and self.is_valid(entry, project_id, repository):
+                    logger.info(f'Revalidated cached modifications: {project_id}')
+                    new_entry = entry
+                else:
+                    new_entry = fetch(repository, project_id)
+            except OSError as e:
+                if entry is None:
+                    raise
+                logger.warning(f'Using stale cached modifications for {project_id}: {e}')
+                return entry
+
+            if new_entry is None:
+                return entry
+
+            new_entry['fetched'] = time.time()
+            self.save(project_id, new_entry)
+            return new_entry
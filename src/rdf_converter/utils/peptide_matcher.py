@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import logging
+import os
+from collections import defaultdict
+from pathlib import Path
+
+from ..models.fasta import Fasta
+
+
+logger = logging.getLogger(__name__)
+
+
+def to_dummy(sequence: str) -> str:
+    return sequence.replace('I', 'J').replace('L', 'J')
+
+
+class PeptideMatcher:
+    '''In-process equivalent of `PeptideMatchCMD -a query -l -e` (I/L treated as equal).'''
+
+    instances: dict[tuple, PeptideMatcher] = {}
+    MIN_SEED_LENGTH = 6
+    MAX_SEED_LENGTH = 8
+
+    def __init__(self, fastas: list[Fasta]):
+        self.fastas = fastas
+        self.dummies = [to_dummy(fasta.get_sequence()) for fasta in fastas]
+
+    def get_fastas(self) -> list[Fasta]:
+        return self.fastas
+
+    @staticmethod
+    def get_instance(fasta_path: str) -> PeptideMatcher:
+        path = Path(fasta_path).resolve()
+        stat = path.stat()
+        key = (str(path), stat.st_size, stat.st_mtime_ns)
+
+        # least recently used first; at most PEPTIDEMATCH_RESIDENT_MATCHERS proteomes stay loaded
+        matcher = PeptideMatcher.instances.pop(key, None)
+        if matcher is None:
+            for old_key in [k for k in PeptideMatcher.instances.keys() if k[0] == key[0]]:
+                del PeptideMatcher.instances[old_key]
+            max_instances = max(1, int(os.getenv('PEPTIDEMATCH_RESIDENT_MATCHERS', '1')))
+            while len(PeptideMatcher.instances) >= max_instances:
+                old_key = next(iter(PeptideMatcher.instances))
+                logger.info(f'Unloading PeptideMatcher: {old_key[0]}')
+                del PeptideMatcher.instances[old_key]
+            logger.info(f'Loading PeptideMatcher: {path}')
+            matcher = PeptideMatcher(Fasta.read_fasta(str(path)))
+        PeptideMatcher.instances[key] = matcher
+        return matcher
+
+    @staticmethod
+    def clear() -> None:
+        PeptideMatcher.instances.clear()
+
+    def match(self, sequences: list[str]) -> list[list[str]]:
+        queries = list(dict.fromkeys(sequence for sequence in sequences if sequence))
+        if len(queries) == 0:
+            return []
+
+        query_dummies = set(to_dummy(query) for query in queries)
+
+        # a short query must not shrink the seed of the whole scan; those are searched directly
+        long_dummies = [dummy for dummy in query_dummies if len(dummy) >= PeptideMatcher.MIN_SEED_LENGTH]
+        short_dummies = [dummy for dummy in query_dummies if len(dummy) < PeptideMatcher.MIN_SEED_LENGTH]
+
+        hits: dict[str, list[tuple[int, int]]] = defaultdict(list)
+        if len(long_dummies) > 0:
+            seed_length = min(PeptideMatcher.MAX_SEED_LENGTH, min(len(dummy) for dummy in long_dummies))
+            seed_map: dict[str, list[str]] = defaultdict(list)
+            for dummy in long_dummies:
+                seed_map[dummy[:seed_length]].append(dummy)
+
+            for fasta_index, protein_dummy in enumerate(self.dummies):
+                for position in range(len(protein_dummy) - seed_length + 1):
+                    candidates = seed_map.get(protein_dummy[position:position + seed_length])
+                    if candidates is not None:
+                        for dummy in candidates:
+                            if protein_dummy.startswith(dummy, position):
+                                hits[dummy].append((fasta_index, position))
+
+        for dummy in short_dummies:
+            for fasta_index, protein_dummy in enumerate(self.dummies):
+                position = protein_dummy.find(dummy)
+                while position >= 0:
+                    hits[dummy].append((fasta_index, position))
+                    position = protein_dummy.find(dummy, position + 1)
+
+        rows = []
+        for query in sequences:
+            if query:
+                for fasta_index, position in hits.get(to_dummy(query), []):
+                    fasta = self.fastas[fasta_index]
+                    rows.append(self.create_row(query, fasta, position))
+
+        logger.info(f'PeptideMatcher: {len(queries)} queries, {len(rows)} matches')
+        return rows
+
+    @staticmethod
+    def create_row(query: str, fasta: Fasta, position: int) -> list[str]:
+        protein_sequence = fasta.get_sequence()
+        subject = fasta.get_title().split()[0] if fasta.get_title() else ''
+        start = position + 1
+        end = position + len(query)
+
+        l_eq_i_positions = []
+        for offset, residue in enumerate(query):
+            if residue != protein_sequence[position + offset]:
+                l_eq_i_positions.append(str(start + offset))
+
+        return [query, subject, str(len(protein_sequence)), str(start), str(end), ','.join(l_eq_i_positions)]
@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import csv
+from typing import Iterator
+
+import numpy as np
+import pandas as pd
+
+
+HEADER_MAP = {
+    'hitpsmcount': 'hits',
+    'sameseqrtime': 'rt',
+    'sameseqplenghitscore': 'score',
+    'sameseqjpostscore': 'jpost_score',
+    'sameseqobsmass': 'obs_mz',
+    'sameseqcharge': 'charge',
+    'sameseqrawfile': 'raw_file',
+    'sameseqscanno': 'scan',
+    'sameseqphosphoconfimedsite': 'phospho_confirmed',
+    'seq': 'sequence',
+    'mod': 'mod',
+    'moddetail': 'mod_detail',
+    'sameseqphosphoambiguoussite': 'phospho_ambiguous',
+    'pepfdr': 'fdr',
+    'title': 'title',
+    'calcmz': 'calc_mz',
+}
+
+HIT_COLUMNS = ['rt', 'score', 'jpost_score', 'obs_mz', 'charge', 'raw_file', 'scan', 'phospho_confirmed', 'phospho_ambiguous']
+
+
+def normalize_header(col: str) -> str:
+    return col.lower().replace(' ', '').replace('-', '').replace('_', '').strip()
+
+
+def read_psm_frames(tsv_path: str, chunk_size: int = 10000) -> Iterator[tuple[pd.DataFrame, pd.DataFrame]]:
+    with open(tsv_path, 'r', encoding='utf-8') as f:
+        header = next(csv.reader(f, delimiter='\t'))
+
+    columns = {name: len(header) - 1 for name in HEADER_MAP.values()}
+    for i, col in enumerate(header):
+        name = HEADER_MAP.get(normalize_header(col))
+        if name is not None:
+            columns[name] = i
+
+    reader = pd.read_csv(
+        tsv_path,
+        sep='\t',
+        header=None,
+        skiprows=1,
+        usecols=sorted(set(columns.values())),
+        dtype=str,
+        keep_default_na=False,
+        na_filter=False,
+        encoding='utf-8',
+        chunksize=chunk_size,
+    )
+    for chunk in reader:
+        rows = pd.DataFrame({name: chunk[i] for name, i in columns.items()}).reset_index(drop=True)
+        yield create_psm_frames(rows)
+
+
+def explode_hits(values: pd.Series, psms: pd.DataFrame) -> np.ndarray:
+    exploded = values.str.split(',').explode()
+    frame = pd.DataFrame({'row': exploded.index, 'value': exploded.to_numpy()})
+    frame['hit'] = frame.groupby('row').cumcount()
+    frame = frame.set_index(['row', 'hit'])['value']
+    keys = pd.MultiIndex.from_arrays([psms['row'], psms['hit']])
+    return frame.reindex(keys).to_numpy(dtype=object)
+
+
+def create_psm_frames(rows: pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame]:
+    hits = rows['hits'].astype(int).to_numpy()
+    psms = pd.DataFrame({'row': np.repeat(rows.index.to_numpy(), hits)})
+    psms['hit'] = psms.groupby('row').cumcount()
+
+    for name in HIT_COLUMNS:
+        values = rows[name]
+        if name in ('phospho_confirmed', 'phospho_ambiguous'):
+            values = values.where(values != '')
+        psms[name] = explode_hits(values, psms)
+
+    tokens = psms['score'].str.split('/')
+    has_score = (tokens.str.len() >= 4).fillna(False).to_numpy(dtype=bool)
+    psms['score_engine'] = tokens.str[1].where(has_score)
+    psms['score_ev'] = tokens.str[2].where(has_score)
+    psms['score_value'] = tokens.str[3].where(has_score)
+
+    ambiguous = psms['phospho_ambiguous'].str.split('/')
+    psms['phospho_ambiguous'] = [
+        [token for token in values if token != ''] if isinstance(values, list) else []
+        for values in ambiguous
+    ]
+
+    labeled = rows['mod'].str.startswith('Label:').to_numpy()
+    psms['variant'] = 0
+    unlabeled_psms = psms[labeled[psms['row'].to_numpy()]].copy()
+    unlabeled_psms['variant'] = -1
+    psms = pd.concat([psms, unlabeled_psms]).sort_values(['row', 'hit', 'variant'], kind='stable').reset_index(drop=True)
+
+    mod = rows['mod'].to_numpy(dtype=object)[psms['row'].to_numpy()]
+    mod_detail = rows['mod_detail'].to_numpy(dtype=object)[psms['row'].to_numpy()]
+    unlabeled = psms['variant'].to_numpy() < 0
+    mod[unlabeled] = ''
+    mod_detail[unlabeled] = ''
+    psms['mod'] = mod
+    psms['mod_detail'] = mod_detail
+
+    jpost_scores = pd.to_numeric(psms['jpost_score'], errors='coerce')
+    max_scores = jpost_scores.groupby(psms['row']).max().reindex(rows.index).fillna(0.0).clip(lower=0.0)
+
+    peptides = pd.DataFrame({
+        'sequence': rows['sequence'],
+        'mod': rows['mod'].where(labeled, ''),
+        'fdr': rows['fdr'].astype(float),
+        'calc_mz': rows['calc_mz'].astype(float),
+        'title': rows['title'],
+        'score': max_scores.astype(float),
+    })
+
+    psms = psms.drop(columns=['score', 'variant']).astype(object)
+    psms = psms.where(psms.notna(), None)
+    return peptides, psms
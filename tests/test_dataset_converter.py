@@ -0,0 +1,73 @@
+from pathlib import Path
+
+from typer.testing import CliRunner
+
+from rdf_converter.cli_converter import app
+from rdf_converter.models.fasta import Fasta
+from rdf_converter.models.modification import Modification
+from rdf_converter.utils.peptide_matcher import PeptideMatcher
+
+
+DATA_DIR = Path(__file__).parent / 'data'
+
+FASTA = '''>sp|P10001|PRT1_HUMAN Protein one
+MTDQNPQSIDIWILSLKIKWWLADEISLYEVFEPIR
+>sp|P10001-2|PRT1_HUMAN Isoform of protein one
+MTDQNPQSIDIWILSLKR
+>sp|P10002|PRT2_HUMAN Protein two
+GGMKWLAKEFGHRSSTYPEPTIDER
+>sp|P10003|PRT3_HUMAN Protein three
+SSTYPEPTIDERPEPTIDEK
+>sp|P10004|PRT4_HUMAN Protein four
+PEPTIDEKAAA
+'''
+
+META_XML = '''<?xml version="1.0"?>
+<Root>
+<Project id="JPST000123" pxid="PXD000001" createdDate="2020-01-01"><Title>T</Title><Description>D</Description>
+<AnnouncementDate>2020-02-02</AnnouncementDate>
+<Contributor><Name>A B</Name><Affiliation>U</Affiliation><PrincipalInvestigator>C D</PrincipalInvestigator></Contributor>
+</Project>
+<presetSummary><Species><PresetElement id="9606"/></Species></presetSummary>
+<FileList>
+<File><Name>result.txt</Name><Type>result</Type><Profile>
+<Sample><note>Sample Type|x|C12345</note></Sample>
+<Fractionation><peptide fraction="10" replicate="2">SCX</peptide></Fractionation>
+<Enzyme_Mod><taxonomy>9606</taxonomy><enzyme id="MS:1001251"/></Enzyme_Mod>
+<MS_mode><instrument id="MS:1000449"/><purpose id="JPO:1"/></MS_mode>
+</Profile></File>
+<File><Name>raw1.raw</Name><Type>raw</Type></File>
+<File><Name>raw2.raw</Name><Type>raw</Type></File>
+</FileList>
+</Root>
+'''
+
+def test_datasets_share_the_matcher(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv('PEPTIDEMATCH_BACKEND', 'python')
+    monkeypatch.setattr(Modification, 'get_modifications_from_jpost_repo', staticmethod(lambda project_id: ([], [])))
+    reads = []
+    read_fasta = Fasta.read_fasta
+    monkeypatch.setattr(Fasta, 'read_fasta', staticmethod(lambda fasta_path: reads.append(fasta_path) or read_fasta(fasta_path)))
+    PeptideMatcher.clear()
+
+    (tmp_path / 'db.fasta').write_text(FASTA)
+    (tmp_path / 'meta.xml').write_text(META_XML)
+    rows = ['tsv\tfasta\tmeta_data\tout\tintermediate_dir\trev\tbranch\tpep']
+    for name in ['first', 'second']:
+        (tmp_path / name).mkdir()
+        rows.append(f'{DATA_DIR / "psm_rows.tsv"}\tdb.fasta\tmeta.xml\t{name}/out.ttl\t{name}\tJPST000123\t1\t')
+    (tmp_path / 'datasets.tsv').write_text('\n'.join(rows) + '\n')
+
+    result = CliRunner().invoke(app, ['datasets', '--list', 'datasets.tsv'])
+    assert result.exit_code == 0, result.output
+
+    # the second conversion finds the matcher loaded by the first one
+    assert len(reads) == 1
+    assert len(PeptideMatcher.instances) == 1
+    first = (tmp_path / 'first' / 'out.ttl').read_text()
+    assert ':PRT123_1_P10001' in first
+    assert (tmp_path / 'second' / 'out.ttl').read_text() == first
+    for name in ['peptidematch_result.txt', 'protein_groups.txt', 'modifications.txt']:
+        assert (tmp_path / 'second' / name).read_text() == (tmp_path / 'first' / name).read_text()
+    PeptideMatcher.clear()
@@ -0,0 +1,85 @@
+import os
+
+from rdf_converter.models.fasta import Fasta, FastaIndex
+from rdf_converter.models.protein import Protein
+
+
+FASTA = (
+    b'>sp|P00001|REGULAR Regular width\n'
+    b'MKTAYIAKQR\n'
+    b'QISFVKSHFS\n'
+    b'RQLEERLG\n'
+    b'>sp|P00002|MIXED Mixed widths\n'
+    b'MSTNPKPQRK\n'
+    b'TKRNTNRR\n'
+    b'PQDVKFPGGG\n'
+    b'QIVGGVYLLPRRG\n'
+    b'>sp|P00003|CRLF Windows line ends\r\n'
+    b'MADEELIKKA\r\n'
+    b'VELLKEAG\r\n'
+    b'>sp|P00004|BLANK Blank line inside\n'
+    b'MGLSDGEWQQ\n'
+    b'\n'
+    b'VLNVWGKVEA\n'
+    b'>sp|P00005|ONELINE Single line\n'
+    b'MVHLTPEEKSAVTALWGKVNVDEVGGEALGRLLVVYPWTQRFFESFGDLST\n'
+)
+
+
+def write_fasta(tmp_path, content: bytes = FASTA):
+    fasta_path = tmp_path / 'db.fasta'
+    fasta_path.write_bytes(content)
+    return str(fasta_path)
+
+
+def check_sequences(fasta_path: str) -> None:
+    expected = {Protein.extract_uniprot_id(fasta.get_title()): fasta.get_sequence() for fasta in Fasta.read_fasta(fasta_path)}
+    with FastaIndex.open(fasta_path, Protein.extract_uniprot_id) as fasta_index:
+        assert len(fasta_index) == len(expected)
+        for accession, sequence in expected.items():
+            assert fasta_index.get_sequence(accession) == sequence
+            for start in range(1, len(sequence) + 1):
+                for end in range(start, len(sequence) + 1):
+                    assert fasta_index.get_sequence(accession, start, end) == sequence[start - 1:end]
+
+
+def test_regular_and_irregular_records(tmp_path):
+    fasta_path = write_fasta(tmp_path)
+    with FastaIndex.open(fasta_path, Protein.extract_uniprot_id) as fasta_index:
+        assert fasta_index.get_record('P00001').line_bases == 10
+        assert fasta_index.get_record('P00002').line_bases == 0
+        assert fasta_index.get_record('P00004').line_bases == 0
+        assert 'P00009' not in fasta_index
+        assert fasta_index.get_sequence('P00009') is None
+    check_sequences(fasta_path)
+
+
+def test_index_is_saved_and_reused(tmp_path):
+    fasta_path = write_fasta(tmp_path)
+    index_path = tmp_path / f'db.fasta{FastaIndex.INDEX_SUFFIX}'
+    assert not index_path.exists()
+    check_sequences(fasta_path)
+    assert index_path.exists()
+
+    saved = index_path.read_text()
+    check_sequences(fasta_path)
+    assert index_path.read_text() == saved
+
+
+def test_stale_index_is_rebuilt(tmp_path):
+    fasta_path = write_fasta(tmp_path)
+    check_sequences(fasta_path)
+
+    write_fasta(tmp_path, FASTA.replace(b'MKTAYIAKQR\n', b'MKTAYIAKQRWW\n'))
+    index_path = tmp_path / f'db.fasta{FastaIndex.INDEX_SUFFIX}'
+    stat = index_path.stat()
+    os.utime(fasta_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    check_sequences(fasta_path)
+
+
+def test_broken_index_is_rebuilt(tmp_path):
+    fasta_path = write_fasta(tmp_path)
+    index_path = tmp_path / f'db.fasta{FastaIndex.INDEX_SUFFIX}'
+    index_path.write_text('P00001\tnot a number\n')
+    os.utime(index_path, ns=(0, os.stat(fasta_path).st_mtime_ns + 1_000_000_000))
+    check_sequences(fasta_path)
@@ -0,0 +1,84 @@
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+from rdf_converter.utils.index_cache import IndexCache
+
+
+def create_build(calls: list, size: int = 100, delay: float = 0.0):
+    def build(index_dir):
+        calls.append(index_dir)
+        time.sleep(delay)
+        (index_dir / 'db_index').write_bytes(b'x' * size)
+    return build
+
+
+def set_used_time(cache: IndexCache, key: str, used: float) -> None:
+    os.utime(cache.cache_dir / key / IndexCache.COMPLETE_FILE, (used, used))
+
+
+def test_concurrent_build(tmp_path):
+    cache = IndexCache(str(tmp_path))
+    calls = []
+    entries = []
+
+    def run():
+        with cache.use('a', create_build(calls, delay=0.3)) as entry:
+            entries.append(entry)
+
+    threads = [threading.Thread(target=run) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert entries == [tmp_path / 'a'] * 4
+    assert (tmp_path / 'a' / 'db_index').exists()
+    assert list(tmp_path.glob(f'a{IndexCache.IN_USE}*')) == []
+
+
+def test_reuse(tmp_path):
+    cache = IndexCache(str(tmp_path))
+    calls = []
+    with cache.use('a', create_build(calls)) as entry:
+        assert len(list(tmp_path.glob(f'a{IndexCache.IN_USE}*'))) == 1
+    with cache.use('a', create_build(calls)) as reused:
+        assert reused == entry
+    assert len(calls) == 1
+
+
+def test_evict_skips_entries_in_use(tmp_path):
+    cache = IndexCache(str(tmp_path), max_bytes=150)
+    calls = []
+    with cache.use('a', create_build(calls)):
+        set_used_time(cache, 'a', time.time() - 100)
+        with cache.use('b', create_build(calls)):
+            assert (tmp_path / 'a' / 'db_index').exists()
+        set_used_time(cache, 'b', time.time() - 50)
+
+    with cache.use('c', create_build(calls)):
+        pass
+    assert not (tmp_path / 'a').exists()
+    assert not (tmp_path / 'b').exists()
+    assert (tmp_path / 'c' / 'db_index').exists()
+
+
+def test_stale_marker_is_ignored(tmp_path):
+    cache = IndexCache(str(tmp_path), max_bytes=150)
+    calls = []
+    with cache.use('a', create_build(calls)):
+        pass
+    set_used_time(cache, 'a', time.time() - 100)
+
+    process = subprocess.Popen([sys.executable, '-c', 'pass'])
+    process.wait()
+    (tmp_path / f'a{IndexCache.IN_USE}{socket.gethostname()}-{process.pid}-0').touch()
+
+    with cache.use('b', create_build(calls)):
+        pass
+    assert not (tmp_path / 'a').exists()
+    assert list(tmp_path.glob(f'a{IndexCache.IN_USE}*')) == []
@@ -0,0 +1,83 @@
+import io
+
+from rdf_converter.models.dataset import DataSet
+from rdf_converter.models.enzyme import Enzyme
+from rdf_converter.models.fractionation import Fractionation
+from rdf_converter.models.metadata import MetadataDocument
+from rdf_converter.models.modification import Modification
+from rdf_converter.models.msmode import MsMode
+from rdf_converter.models.project import Project
+from rdf_converter.models.rawdata_list import RawDataList
+from rdf_converter.models.sample import Sample
+
+
+META_XML = '''<?xml version="1.0"?>
+<Root>
+<Project id="JPST000123" pxid="PXD000001" createdDate="2020-01-01"><Title>T</Title><Description>D</Description>
+<AnnouncementDate>2020-02-02</AnnouncementDate>
+<Contributor><Name>A B</Name><Affiliation>U</Affiliation><PrincipalInvestigator>C D</PrincipalInvestigator></Contributor>
+</Project>
+<presetSummary><Species><PresetElement id="9606"/></Species></presetSummary>
+<FileList>
+<File><Name>peaklist.mgf</Name><Type>peak</Type><Checksum>0a</Checksum></File>
+<File><Name>result.txt</Name><Type>result</Type><Profile>
+<Sample><note>Sample Type|x|C12345
+Organ|liver|C222</note></Sample>
+<Fractionation><peptide fraction="10" replicate="2">SCX</peptide></Fractionation>
+<Enzyme_Mod><taxonomy>9606</taxonomy><enzyme id="MS:1001251"/></Enzyme_Mod>
+<MS_mode><instrument id="MS:1000449"/><purpose id="JPO:1"/><note>Quantification Method|x|MS:1001834
+Note|hello</note></MS_mode>
+</Profile></File>
+<File><Name>raw0.raw</Name><Type>raw</Type><Checksum>01</Checksum></File>
+<File><Name>raw1.raw</Name><Type>RAW</Type></File>
+<File><Type>raw</Type></File>
+<File><Name>raw2.raw</Name><Type>raw</Type><Profile><Sample><note>Sample Type|y|C99999</note></Sample></Profile></File>
+<File><Name>raw0.raw</Name><Type>raw</Type></File>
+<File><Name>notes.txt</Name></File>
+</FileList>
+</Root>
+'''
+
+
+def read_all(xml_path: str, iterparse: bool) -> dict[str, str]:
+    metadata = MetadataDocument.read(xml_path, iterparse=iterparse)
+    project = Project.read_project(metadata)
+    dataset = DataSet(project, '1')
+    readers = {
+        'project': project,
+        'sample': Sample.read_sample(dataset, metadata),
+        'fractionation': Fractionation.read_fractionation(dataset, metadata),
+        'enzyme': Enzyme.read_enzyme(dataset, metadata),
+        'ms_mode': MsMode.read_ms_mode(dataset, metadata),
+        'rawdata_list': RawDataList.read_rawdata_list(dataset, metadata),
+    }
+    outputs = {}
+    for name, model in readers.items():
+        f = io.StringIO()
+        model.to_ttl(f)
+        outputs[name] = f.getvalue()
+    outputs['files'] = repr(metadata.get_files())
+    return outputs
+
+
+def test_iterparse_matches_tree(tmp_path, monkeypatch):
+    monkeypatch.setattr(Modification, 'get_modifications_from_jpost_repo', staticmethod(lambda project_id: ([], [])))
+    xml_path = tmp_path / 'meta.xml'
+    xml_path.write_text(META_XML)
+
+    tree = read_all(str(xml_path), iterparse=False)
+    streamed = read_all(str(xml_path), iterparse=True)
+    assert streamed == tree
+    assert 'C12345' in tree['sample']
+    assert 'raw2.raw' in tree['rawdata_list']
+
+
+def test_iterparse_drops_files_without_profile(tmp_path):
+    xml_path = tmp_path / 'meta.xml'
+    xml_path.write_text(META_XML)
+
+    tree = MetadataDocument.read(str(xml_path))
+    streamed = MetadataDocument.read(str(xml_path), iterparse=True)
+    assert streamed.get_files() == tree.get_files()
+    assert len(tree.get_files()) == 8
+    assert [file.findtext('Name') for file in streamed.get_root().findall('FileList/File')] == ['result.txt', 'raw2.raw']
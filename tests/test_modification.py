@@ -0,0 +1,41 @@
+from rdf_converter.models.modification import Modification
+
+
+MTD_LINES = [
+    'MTD\tmzTab-version\t1.0.0',
+    'MTD\tfixed_mod[1]\t[UNIMOD, UNIMOD:4, Carbamidomethyl, ]',
+    'MTD\tfixed_mod[1]-site\tC',
+    'MTD\tfixed_mod[1]-position\tAnywhere',
+    'COM\tcomment',
+    '',
+    'MTD\tvariable_mod[1]\t[UNIMOD, UNIMOD:35, Oxidation, ]',
+    'PSH\tsequence\tPSM_ID',
+    'MTD\tvariable_mod[2]\t[UNIMOD, UNIMOD:21, Phospho, ]',
+]
+
+
+def get_modifications(lines):
+    fixed_mods, variable_mods = Modification.read_mtd_modifications(lines)
+    return ([(mod.get_title(), mod.get_unimod()) for mod in fixed_mods],
+            [(mod.get_title(), mod.get_unimod()) for mod in variable_mods])
+
+
+def test_read_mtd_modifications():
+    assert get_modifications(MTD_LINES) == ([('Carbamidomethyl', '4')], [('Oxidation', '35')])
+
+
+def test_read_mtd_modifications_with_bom():
+    lines = ['\ufeff' + MTD_LINES[0]] + MTD_LINES[1:]
+    assert get_modifications(lines) == ([('Carbamidomethyl', '4')], [('Oxidation', '35')])
+
+
+def test_read_mtd_modifications_stops_after_mtd_section():
+    consumed = []
+
+    def read_lines():
+        for line in MTD_LINES + ['PSM\tPEPTIDE\t1'] * 1000:
+            consumed.append(line)
+            yield line
+
+    get_modifications(read_lines())
+    assert len(consumed) == MTD_LINES.index('PSH\tsequence\tPSM_ID') + 1
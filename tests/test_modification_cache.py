@@ -0,0 +1,69 @@
+import time
+
+from rdf_converter.models.modification import Modification
+from rdf_converter.utils.jpost_repository import find_result_file
+from rdf_converter.utils.modification_cache import ModificationCache
+
+
+PROJECT_XML = b'<Root><FileList><File><Name>result.mzTab</Name><Type>result</Type></File></FileList></Root>'
+MZTAB = [
+    'MTD\tmzTab-version\t1.0.0',
+    'MTD\tfixed_mod[1]\t[UNIMOD, UNIMOD:4, Carbamidomethyl, ]',
+    'MTD\tvariable_mod[1]\t[UNIMOD, UNIMOD:35, Oxidation, ]',
+    'PSH\tsequence',
+]
+
+
+class FakeRepository:
+    def __init__(self, project_xml: bytes, etag: str = 'v1'):
+        self.project_xml = project_xml
+        self.etag = etag
+        self.opened = 0
+
+    def get_result_file(self, project_id):
+        return find_result_file(self.project_xml)
+
+    def get_etag(self, project_id, result_file):
+        return self.etag
+
+    def open_result(self, project_id, result_file):
+        self.opened += 1
+        return self.etag, (line for line in MZTAB)
+
+
+def get_titles(entry):
+    return [values['title'] for values in entry['fixed']], [values['title'] for values in entry['variable']]
+
+
+def test_fetch_and_reuse(tmp_path):
+    cache = ModificationCache(str(tmp_path), ttl=3600)
+    repository = FakeRepository(PROJECT_XML)
+    entry = cache.get_or_fetch('JPST1', repository, Modification.fetch_modifications)
+    assert get_titles(entry) == (['Carbamidomethyl'], ['Oxidation'])
+    cache.get_or_fetch('JPST1', repository, Modification.fetch_modifications)
+    assert repository.opened == 1
+
+
+def test_revalidate_by_etag(tmp_path):
+    cache = ModificationCache(str(tmp_path), ttl=0)
+    repository = FakeRepository(PROJECT_XML)
+    cache.get_or_fetch('JPST1', repository, Modification.fetch_modifications)
+    cache.get_or_fetch('JPST1', repository, Modification.fetch_modifications)
+    assert repository.opened == 1
+    repository.etag = 'v2'
+    entry = cache.get_or_fetch('JPST1', repository, Modification.fetch_modifications)
+    assert repository.opened == 2
+    assert entry['etag'] == 'v2'
+
+
+def test_html_response_uses_stale_entry(tmp_path):
+    cache = ModificationCache(str(tmp_path), ttl=3600)
+    cache.get_or_fetch('JPST1', FakeRepository(PROJECT_XML), Modification.fetch_modifications)
+    entry = cache.load('JPST1')
+    entry['fetched'] = time.time() - 7200
+    cache.save('JPST1', entry)
+
+    repository = FakeRepository(b'<html><body>Under maintenance<br></body></html>')
+    entry = cache.get_or_fetch('JPST1', repository, Modification.fetch_modifications)
+    assert get_titles(entry) == (['Carbamidomethyl'], ['Oxidation'])
+    assert repository.opened == 0
@@ -0,0 +1,111 @@
+from random import Random
+
+from rdf_converter.models.fasta import Fasta
+from rdf_converter.utils.peptide_matcher import PeptideMatcher, to_dummy
+
+
+FASTA = '''>sp|P00001|PEP1_HUMAN Protein one
+MKPEPLIDEK
+RPEPLIDE
+>sp|P00002|PEP2_HUMAN Protein two (reversed peptide only)
+GGEDILPEPGG
+'''
+
+
+def create_matcher(tmp_path) -> PeptideMatcher:
+    fasta_path = tmp_path / 'db.fasta'
+    fasta_path.write_text(FASTA)
+    return PeptideMatcher(Fasta.read_fasta(str(fasta_path)))
+
+
+def test_match_rows(tmp_path):
+    matcher = create_matcher(tmp_path)
+    rows = matcher.match(['PEPLIDE'])
+    assert rows == [
+        ['PEPLIDE', 'sp|P00001|PEP1_HUMAN', '18', '3', '9', ''],
+        ['PEPLIDE', 'sp|P00001|PEP1_HUMAN', '18', '12', '18', ''],
+    ]
+
+
+def test_match_l_eq_i_positions(tmp_path):
+    matcher = create_matcher(tmp_path)
+    rows = matcher.match(['PEPIIDE'])
+    assert rows == [
+        ['PEPIIDE', 'sp|P00001|PEP1_HUMAN', '18', '3', '9', '6'],
+        ['PEPIIDE', 'sp|P00001|PEP1_HUMAN', '18', '12', '18', '15'],
+    ]
+
+
+def test_match_ignores_reversed_sequence(tmp_path):
+    matcher = create_matcher(tmp_path)
+    rows = matcher.match(['PEPLIDE', 'PEPILDE'])
+    assert all(row[1] == 'sp|P00001|PEP1_HUMAN' for row in rows)
+    assert matcher.match(['EDILPEP'])[0][1] == 'sp|P00002|PEP2_HUMAN'
+
+
+def test_match_duplicate_queries(tmp_path):
+    matcher = create_matcher(tmp_path)
+    rows = matcher.match(['PEPLIDE', 'NOTFOUND', 'PEPIIDE', '', 'PEPLIDE'])
+    assert [(row[0], row[3]) for row in rows] == [
+        ('PEPLIDE', '3'), ('PEPLIDE', '12'),
+        ('PEPIIDE', '3'), ('PEPIIDE', '12'),
+        ('PEPLIDE', '3'), ('PEPLIDE', '12'),
+    ]
+
+
+def test_resident_instances_are_bounded(tmp_path, monkeypatch):
+    paths = []
+    for i in range(3):
+        fasta_path = tmp_path / f'db{i}.fasta'
+        fasta_path.write_text(FASTA)
+        paths.append(str(fasta_path))
+
+    PeptideMatcher.clear()
+    monkeypatch.setenv('PEPTIDEMATCH_RESIDENT_MATCHERS', '2')
+    first = PeptideMatcher.get_instance(paths[0])
+    PeptideMatcher.get_instance(paths[1])
+    assert PeptideMatcher.get_instance(paths[0]) is first
+    PeptideMatcher.get_instance(paths[2])
+    assert [key[0] for key in PeptideMatcher.instances] == [str(tmp_path / 'db0.fasta'), str(tmp_path / 'db2.fasta')]
+
+    monkeypatch.setenv('PEPTIDEMATCH_RESIDENT_MATCHERS', '1')
+    PeptideMatcher.get_instance(paths[1])
+    assert len(PeptideMatcher.instances) == 1
+
+    PeptideMatcher.clear()
+    assert len(PeptideMatcher.instances) == 0
+
+
+def match_directly(fastas: list[Fasta], query: str) -> list[list[str]]:
+    dummy = to_dummy(query)
+    rows = []
+    for fasta in fastas:
+        protein_dummy = to_dummy(fasta.get_sequence())
+        for position in range(len(protein_dummy) - len(dummy) + 1):
+            if protein_dummy[position:position + len(dummy)] == dummy:
+                rows.append(PeptideMatcher.create_row(query, fasta, position))
+    return rows
+
+
+def test_match_short_and_long_queries():
+    random = Random(7)
+    fastas = [
+        Fasta(f'sp|P{i:05d}|RANDOM', ''.join(random.choice('ACDEILKLMNPQ') for _ in range(random.randint(3, 300))))
+        for i in range(30)
+    ]
+    matcher = PeptideMatcher(fastas)
+
+    queries = ['LI', 'K', 'IL', 'ACDE']
+    for _ in range(60):
+        fasta = random.choice(fastas)
+        length = random.randint(2, 12)
+        start = random.randint(0, max(0, len(fasta.get_sequence()) - length))
+        query = fasta.get_sequence()[start:start + length]
+        # swap some L/I so hits depend on I/L equivalence
+        queries.append(''.join({'L': 'I', 'I': 'L'}.get(c, c) if random.random() < 0.5 else c for c in query))
+
+    rows = matcher.match(queries)
+    expected = [row for query in queries if query for row in match_directly(fastas, query)]
+    assert rows == expected
+    assert any(len(row[0]) < PeptideMatcher.MIN_SEED_LENGTH for row in rows)
+    assert any(row[5] != '' for row in rows)
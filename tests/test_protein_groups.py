@@ -0,0 +1,257 @@
+from collections import defaultdict
+from random import Random
+
+from rdf_converter.models.dataset import DataSet
+from rdf_converter.models.group import Group
+from rdf_converter.models.isoform import Isoform
+from rdf_converter.models.peptide import Peptide
+from rdf_converter.models.project import Project
+from rdf_converter.models.protein import Protein
+
+
+# uniprot, peptides, in optimization list
+PROTEINS = [
+    ('P00001', ['AAAK', 'CCCK', 'DDDK'], True),
+    ('P00002', ['DDDK', 'EEEK'], True),
+    ('P00003', ['FFFK'], True),
+    ('P00011', ['AAAK', 'CCCK'], False),          # subset of P00001
+    ('P00012', ['DDDK'], False),                  # subset of P00001 and P00002
+    ('P00013', ['CCCK', 'DDDK', 'AAAK'], False),  # same set as P00001
+    ('P00014', ['EEEK', 'DDDK'], False),          # same set as P00002
+    ('P00015', ['GGGK', 'HHHK'], False),          # disjoint
+    ('P00016', ['AAAK', 'GGGK'], False),          # overlaps P00001, not contained
+    ('P00017', ['PEPIIDEK'], False),              # same dummy as PEPLIDEK of P00004
+    ('P00004', ['PEPLIDEK', 'FFFK'], True),
+    ('P00018', ['FFFK'], False),                  # same set as P00003, subset of P00004
+    ('P00019', [], False),                        # no peptides
+    ('P00005', ['MMMK'], False),                  # leading through its isoform
+    ('P00020', ['MMMK', 'NNNK'], False),          # same set as P00005 with its isoform
+    ('P00021', ['NNNK'], False),                  # subset of the isoform of P00005
+]
+
+ISOFORMS = [
+    ('P00005', 'P00005-2', ['NNNK'], True),
+]
+
+
+def create_proteins(specs=PROTEINS, isoform_specs=ISOFORMS) -> list[Protein]:
+    dataset = DataSet(Project('JPST000123'), '1')
+    peptides: dict[str, Peptide] = {}
+
+    def add_matches(protein_or_isoform, sequences):
+        for sequence in sequences:
+            peptide = peptides.setdefault(sequence, Peptide(dataset, sequence))
+            if isinstance(protein_or_isoform, Protein):
+                protein_or_isoform.add_match(peptide, '1', str(len(sequence)))
+            else:
+                protein = Protein(dataset, protein_or_isoform.get_uniprot())
+                protein.add_match(peptide, '1', str(len(sequence)))
+                protein_or_isoform.get_peptide_matches().extend(protein.get_peptide_matches())
+
+    proteins = []
+    protein_map = {}
+    for uniprot, sequences, optimized in specs:
+        protein = Protein(dataset, uniprot)
+        add_matches(protein, sequences)
+        protein.set_in_optimization_list(optimized)
+        proteins.append(protein)
+        protein_map[uniprot] = protein
+
+    for base_uniprot, uniprot, sequences, optimized in isoform_specs:
+        isoform = Isoform()
+        isoform.set_uniprot(uniprot)
+        isoform.set_protein(protein_map[base_uniprot])
+        isoform.set_in_optimization_list(optimized)
+        add_matches(isoform, sequences)
+        protein_map[base_uniprot].add_isoform(isoform)
+    return proteins
+
+
+def create_random_specs(random: Random) -> tuple[list, list]:
+    universe = [f'{amino}{amino}{amino}K' for amino in 'ACDEFGHMNPQRSTVWY'[:random.randint(3, 12)]]
+    specs = []
+    for i in range(random.randint(1, 30)):
+        sequences = random.sample(universe, random.randint(0, min(4, len(universe))))
+        specs.append((f'P{i:05d}', sequences, random.random() < 0.3))
+    isoform_specs = []
+    for base_uniprot, _, _ in random.sample(specs, min(3, len(specs))):
+        isoform_specs.append((base_uniprot, f'{base_uniprot}-2', random.sample(universe, 1), random.random() < 0.5))
+    return specs, isoform_specs
+
+
+def check_proteins_pairwise(proteins: list[Protein]) -> None:
+    # check_proteins before the leading-protein postings, kept as the reference
+    protein_map = {p.get_uniprot(): p for p in proteins}
+
+    leading_flag = {}
+    for p in proteins:
+        leading = p.is_in_optimization_list() or any(iso.is_in_optimization_list() for iso in p.get_isoforms())
+        p.set_leading(leading)
+        p.set_anchor(False)
+        p.set_same(False)
+        p.set_subset(False)
+        leading_flag[p.get_uniprot()] = leading
+
+    pep_set_by_u = {}
+    for p in proteins:
+        pep_set_by_u[p.get_uniprot()] = frozenset(peptide.get_dummy() for peptide in p.search_peptides())
+
+    leading_items = [(u, pep_set_by_u[u]) for u in pep_set_by_u.keys() if leading_flag[u]]
+
+    exact_map = defaultdict(list)
+    for u, s in leading_items:
+        exact_map[s].append(u)
+
+    for p in proteins:
+        if not p.is_leading():
+            S = pep_set_by_u[p.get_uniprot()]
+            if S:
+                has_same = False
+                if S in exact_map:
+                    p.set_same(True)
+                    for lead_u in exact_map[S]:
+                        protein_map[lead_u].set_anchor(True)
+                        has_same = True
+
+                if not has_same:
+                    for lead_u, L in leading_items:
+                        if len(S) <= len(L) and S.issubset(L):
+                            p.set_subset(True)
+                            leading_list = p.get_leading_proteins()
+                            if not any(lp.get_uniprot() == lead_u for lp in leading_list):
+                                leading_list.append(protein_map[lead_u])
+
+
+def get_flags(proteins: list[Protein]) -> list[tuple]:
+    return [
+        (
+            protein.get_uniprot(),
+            protein.is_leading(),
+            protein.is_anchor(),
+            protein.is_same(),
+            protein.is_subset(),
+            [leading.get_uniprot() for leading in protein.get_leading_proteins()],
+        )
+        for protein in proteins
+    ]
+
+
+def test_check_proteins_fixture():
+    proteins = create_proteins()
+    Protein.check_proteins(proteins)
+    expected = create_proteins()
+    check_proteins_pairwise(expected)
+    assert get_flags(proteins) == get_flags(expected)
+
+    flags = {flag[0]: flag[1:] for flag in get_flags(proteins)}
+    assert flags['P00001'] == (True, True, False, False, [])
+    assert flags['P00011'] == (False, False, False, True, ['P00001'])
+    assert flags['P00012'] == (False, False, False, True, ['P00001', 'P00002'])
+    assert flags['P00013'] == (False, False, True, False, [])
+    assert flags['P00015'] == (False, False, False, False, [])
+    assert flags['P00016'] == (False, False, False, False, [])
+    assert flags['P00017'] == (False, False, False, True, ['P00004'])
+    assert flags['P00018'] == (False, False, True, False, [])
+    assert flags['P00019'] == (False, False, False, False, [])
+    assert flags['P00005'] == (True, True, False, False, [])
+    assert flags['P00020'] == (False, False, True, False, [])
+    assert flags['P00021'] == (False, False, False, True, ['P00005'])
+
+
+def test_check_proteins_random():
+    random = Random(19)
+    for _ in range(200):
+        specs, isoform_specs = create_random_specs(random)
+        proteins = create_proteins(specs, isoform_specs)
+        Protein.check_proteins(proteins)
+        expected = create_proteins(specs, isoform_specs)
+        check_proteins_pairwise(expected)
+        assert get_flags(proteins) == get_flags(expected)
+
+
+def create_groups_pairwise(dataset: DataSet, proteins: list[Protein], optimized_proteins: list[Protein]) -> list[Group]:
+    # create_groups before the peptide-to-group index, kept as the reference
+    groups: list[Group] = []
+    group_map: dict[str, Group] = {}
+    for protein in optimized_proteins:
+        uniprot = protein.get_uniprot()
+        index = uniprot.rfind('-')
+        if index >= 0:
+            uniprot = uniprot[:index]
+        group = protein.get_group()
+        if group is None:
+            group = Group(f'PG{dataset.get_number()}_{len(groups)+1}')
+            groups.append(group)
+        if uniprot not in group_map:
+            group_map[uniprot] = group
+
+    peptide_map: dict[Group, set[str]] = {}
+    for protein in proteins:
+        uniprot = protein.get_uniprot()
+        index = uniprot.rfind('-')
+        if index >= 0:
+            uniprot = uniprot[:index]
+        if uniprot in group_map:
+            group = group_map[uniprot]
+            protein.set_group(group)
+            group.add_protein(protein)
+            peptide_set = peptide_map.setdefault(group, set())
+            for peptide in protein.search_peptides():
+                peptide_set.add(peptide.get_dummy())
+        else:
+            protein.set_group(None)
+
+    for protein in proteins:
+        group = protein.get_group()
+        if group is None:
+            peptides = protein.search_peptides()
+            for current in peptide_map.keys():
+                if all(peptide.get_dummy() in peptide_map[current] for peptide in peptides):
+                    group = current
+            if group is None:
+                group = Group(f'PG{dataset.get_number()}_{len(groups)+1}')
+                peptide_map[group] = {peptide.get_dummy() for peptide in peptides}
+                groups.append(group)
+            protein.set_group(group)
+    return groups
+
+
+def get_membership(proteins: list[Protein], groups: list[Group]) -> tuple[list, list]:
+    return (
+        [(protein.get_uniprot(), protein.get_group().get_id()) for protein in proteins],
+        [(group.get_id(), [protein.get_uniprot() for protein in group.get_proteins()]) for group in groups],
+    )
+
+
+def run_create_groups(create_groups, specs, isoform_specs, optimized_uniprots) -> tuple[list, list]:
+    proteins = create_proteins(specs, isoform_specs)
+    protein_map = {protein.get_uniprot(): protein for protein in proteins}
+    optimized_proteins = [protein_map[uniprot] for uniprot in optimized_uniprots]
+    groups = create_groups(proteins[0].get_dataset(), proteins, optimized_proteins)
+    return get_membership(proteins, groups)
+
+
+def test_create_groups_fixture():
+    # P00005-2 stands for a selected isoform and joins the group of P00005
+    specs = PROTEINS + [('P00005-2', ['NNNK'], True)]
+    optimized = ['P00001', 'P00002', 'P00003', 'P00004', 'P00005-2']
+    membership = run_create_groups(Group.create_groups, specs, ISOFORMS, optimized)
+    assert membership == run_create_groups(create_groups_pairwise, specs, ISOFORMS, optimized)
+
+    # an ungrouped protein joins the last group holding all of its peptides, or starts a new one
+    protein_groups = dict(membership[0])
+    assert protein_groups['P00011'] == protein_groups['P00013'] == protein_groups['P00001']
+    assert protein_groups['P00012'] == protein_groups['P00014'] == protein_groups['P00002']
+    assert protein_groups['P00017'] == protein_groups['P00018'] == protein_groups['P00004']
+    assert protein_groups['P00020'] == protein_groups['P00021'] == protein_groups['P00005'] == protein_groups['P00005-2']
+    assert protein_groups['P00015'] == 'PG123_1_6'
+    assert protein_groups['P00016'] == protein_groups['P00019'] == 'PG123_1_7'
+    assert [group_id for group_id, _ in membership[1]] == [f'PG123_1_{i}' for i in range(1, 8)]
+
+def test_create_groups_random():
+    random = Random(20)
+    for _ in range(200):
+        specs, isoform_specs = create_random_specs(random)
+        optimized = [uniprot for uniprot, _, in_optimization_list in specs if in_optimization_list]
+        assert run_create_groups(Group.create_groups, specs, isoform_specs, optimized) == \
+            run_create_groups(create_groups_pairwise, specs, isoform_specs, optimized)
@@ -0,0 +1,267 @@
+import heapq
+from pathlib import Path
+from random import Random
+
+import pulp
+
+from rdf_converter.models.dataset import DataSet
+from rdf_converter.models.peptide import Peptide
+from rdf_converter.models.project import Project
+from rdf_converter.models.protein import Protein
+
+
+DATA_DIR = Path(__file__).parent / 'data'
+
+
+def create_instance(random: Random, protein_count: int, peptide_count: int, max_size: int) -> dict[str, set]:
+    # few peptides per protein from a small universe, so equal counts (ties) and equal sets are common
+    cover_sets = {}
+    for i in random.sample(range(protein_count * 10), protein_count):
+        size = random.randint(1, max_size)
+        cover_sets[f'P{i:05d}'] = {f'PEP{random.randrange(peptide_count)}' for _ in range(size)}
+    return cover_sets
+
+
+def is_cover(cover_sets: dict[str, set], selected: list[str]) -> bool:
+    covered = set()
+    for uniprot_id in selected:
+        covered |= cover_sets[uniprot_id]
+    return covered == set().union(*cover_sets.values())
+
+
+def solve_greedy_by_generation(cover_sets: dict[str, set]) -> list[str]:
+    # The greedy before the integer rewrite, kept as the reference.
+    uncovered_peptides: set = set()
+    for peptide_set in cover_sets.values():
+        uncovered_peptides |= peptide_set
+    if len(uncovered_peptides) == 0:
+        return []
+
+    heap: list[tuple[int, int, str]] = []
+    current_generation = 0
+    for uniprot_id, peptide_set in cover_sets.items():
+        heapq.heappush(heap, (-len(peptide_set), current_generation, uniprot_id))
+
+    selected_uniprots: list[str] = []
+    while len(uncovered_peptides) > 0 and len(heap) > 0:
+        neg_coverage, generation, candidate_uniprot = heapq.heappop(heap)
+        recalculated_coverage = len(cover_sets[candidate_uniprot] & uncovered_peptides)
+        is_generation_outdated = generation != current_generation
+        is_candidate_useful = recalculated_coverage > 0
+
+        if is_generation_outdated and is_candidate_useful:
+            heapq.heappush(heap, (-recalculated_coverage, current_generation, candidate_uniprot))
+        elif is_candidate_useful:
+            selected_uniprots.append(candidate_uniprot)
+            uncovered_peptides -= cover_sets[candidate_uniprot] & uncovered_peptides
+            current_generation += 1
+    return selected_uniprots
+
+
+def test_greedy_matches_previous_greedy():
+    random = Random(18)
+    for _ in range(300):
+        cover_sets = create_instance(random, random.randint(1, 40), random.randint(1, 30), random.randint(1, 6))
+        selected = Protein.solve_greedy(cover_sets)
+        assert selected == solve_greedy_by_generation(cover_sets)
+        assert is_cover(cover_sets, selected)
+
+
+def test_greedy_ties():
+    # P1 wins the first five-way tie of two peptides and P3 the tie with P4 for 'a'
+    cover_sets = {
+        'P4': {'a', 'b'},
+        'P2': {'c', 'd'},
+        'P3': {'a', 'b'},
+        'P1': {'b', 'c'},
+        'P5': {'d', 'e'},
+    }
+    assert Protein.solve_greedy(cover_sets) == solve_greedy_by_generation(cover_sets) == ['P1', 'P5', 'P3']
+    assert Protein.solve_greedy({}) == []
+
+
+def create_stats() -> dict:
+    return {'solver': 'ilp', 'proteins': 0, 'peptides': 0, 'status': '', 'objective': None, 'bound': None, 'gap': None, 'time': None, 'fallback': False}
+
+
+def test_parse_cbc_log():
+    log = (DATA_DIR / 'cbc_time_limit.log').read_text()
+    assert Protein.parse_cbc_log(log) == {'bound': 66.667, 'gap': 1.03}
+    assert Protein.parse_cbc_log('Result - Optimal solution found\n\nObjective value:                4.00000000\n') == {}
+    assert Protein.parse_cbc_log('Lower bound:                    -1.#IND\n') == {}
+
+
+def test_time_limit_falls_back_to_greedy(monkeypatch):
+    random = Random(17)
+    cover_sets = create_instance(random, 60, 40, 5)
+    solvers = []
+
+    def stop_on_time_limit(prob, solver):
+        # what CBC reports when the time limit hits before an integer solution is found
+        solvers.append(solver)
+        Path(solver.optionsDict['logPath']).write_text((DATA_DIR / 'cbc_time_limit.log').read_text())
+        prob.status = pulp.LpStatusNotSolved
+        prob.sol_status = pulp.LpSolutionNoSolutionFound
+        prob.solutionTime = 2.79
+        return prob.status
+
+    monkeypatch.setattr(pulp.LpProblem, 'solve', stop_on_time_limit)
+    monkeypatch.setenv('ILP_TIME_LIMIT', '2')
+    stats = create_stats()
+    selected = Protein.solve_ilp(cover_sets, stats)
+
+    assert selected == Protein.solve_greedy(cover_sets)
+    assert solvers[0].timeLimit == 2
+    assert solvers[0].optionsDict['warmStart']
+    assert stats['fallback']
+    assert stats['status'] == 'No Solution Found'
+    assert stats['objective'] == len(selected)
+    assert (stats['bound'], stats['gap'], stats['time']) == (66.667, 1.03, 2.79)
+
+
+def test_tiny_ilp_is_not_warm_started(monkeypatch):
+    cover_sets = {'P1': {'a', 'b'}, 'P2': {'b', 'c'}, 'P3': {'c', 'd'}}
+    warm_starts = []
+    solve = pulp.LpProblem.solve
+
+    def record_warm_start(prob, solver):
+        warm_starts.append(solver.optionsDict['warmStart'])
+        return solve(prob, solver)
+
+    monkeypatch.setattr(pulp.LpProblem, 'solve', record_warm_start)
+    stats = create_stats()
+    assert sorted(Protein.solve_ilp(cover_sets, stats)) == ['P1', 'P3']
+    assert warm_starts == [False]
+    assert not stats['fallback']
+    assert (stats['bound'], stats['gap']) == (2.0, 0.0)
+
+    monkeypatch.setattr(Protein, 'ILP_WARM_START_PROTEINS', 3)
+    assert sorted(Protein.solve_ilp(cover_sets)) == ['P1', 'P3']
+    assert warm_starts == [False, True]
+
+
+def create_ring_proteins(random: Random) -> list[Protein]:
+    # rings of proteins sharing one peptide with each neighbour survive the reduction as
+    # components; the longest ring goes over PROTEIN_PARAMETER and is solved greedily
+    dataset = DataSet(Project('JPST000123'), '1')
+    proteins = []
+    sequence_number = 0
+    for ring, size in enumerate([3, 5, 4, 7, 3, 6, 5, 9, 3, 4, 21]):
+        peptides = []
+        for _ in range(size):
+            sequence_number += 1
+            peptides.append(Peptide(dataset, f'PEPTIDE{sequence_number:04d}K'))
+        ring_proteins = []
+        for i in range(size):
+            protein = Protein(dataset, f'R{ring:02d}P{i:02d}')
+            protein.add_match(peptides[i], '1', '12')
+            protein.add_match(peptides[(i + 1) % size], '13', '24')
+            ring_proteins.append(protein)
+        random.shuffle(ring_proteins)
+        proteins.extend(ring_proteins)
+    random.shuffle(proteins)
+    return proteins
+
+
+def test_optimize_with_workers_matches_single_worker(monkeypatch):
+    proteins = create_ring_proteins(Random(13))
+    monkeypatch.setenv('PROTEIN_PARAMETER', '15')
+    monkeypatch.setenv('OPTIMIZER_BATCH_PROTEINS', '8')
+
+    monkeypatch.setenv('OPTIMIZER_WORKERS', '1')
+    single_stats = []
+    single = Protein.optimize(proteins, single_stats)
+
+    monkeypatch.setenv('OPTIMIZER_WORKERS', '3')
+    pooled_stats = []
+    pooled = Protein.optimize(proteins, pooled_stats)
+
+    assert [protein.get_uniprot() for protein in pooled] == [protein.get_uniprot() for protein in single]
+    assert [(task['solver'], task['proteins'], task['objective']) for task in pooled_stats] == \
+        [(task['solver'], task['proteins'], task['objective']) for task in single_stats]
+    assert len(pooled_stats) > 3
+    # half of each ring, rounded up, and 11 of 21 by greedy for the longest ring
+    assert len(single) == 28 + 11
+    assert 'greedy' in [task['solver'] for task in pooled_stats]
+
+    monkeypatch.setenv('OPTIMIZER_BATCH_PROTEINS', '1000')
+    assert len(Protein.optimize(proteins)) == len(single)
+
+
+def solve_whole_ilp(cover_sets: dict[str, set]) -> int:
+    # plain ILP over the whole instance, without reduction, components or warm start
+    prob = pulp.LpProblem('Whole_Set_Cover', pulp.LpMinimize)
+    protein_vars = {uniprot_id: pulp.LpVariable(f'P_{uniprot_id}', cat='Binary') for uniprot_id in cover_sets}
+    prob += pulp.lpSum(protein_vars.values())
+    for peptide in set().union(*cover_sets.values()):
+        prob += pulp.lpSum(var for uniprot_id, var in protein_vars.items() if peptide in cover_sets[uniprot_id]) >= 1
+    prob.solve(pulp.PULP_CBC_CMD(msg=False))
+    assert prob.sol_status == pulp.LpSolutionOptimal
+    return round(pulp.value(prob.objective))
+
+
+def test_reduced_components_match_whole_ilp():
+    random = Random(15)
+    for _ in range(40):
+        cover_sets = create_instance(random, random.randint(2, 30), random.randint(2, 25), random.randint(1, 5))
+        forced_ids, reduced_sets = Protein.reduce_set_cover(cover_sets)
+        selected = list(forced_ids)
+        for component in Protein.find_components(reduced_sets):
+            selected.extend(Protein.solve_ilp(component))
+
+        assert len(selected) == len(set(selected))
+        assert is_cover(cover_sets, selected)
+        assert len(selected) == solve_whole_ilp(cover_sets)
+
+
+def test_reduce_keeps_canonical_over_isoform():
+    forced_ids, cover_sets = Protein.reduce_set_cover({
+        'P00001-2': {'a', 'b'},
+        'P00001': {'a', 'b'},
+        'P00002-3': {'b', 'c'},
+        'P00002-2': {'b', 'c'},
+        'P00003': {'c', 'a'},
+    })
+    assert forced_ids == []
+    assert cover_sets == {'P00001': {'a', 'b'}, 'P00002-3': {'b', 'c'}, 'P00003': {'a', 'c'}}
+
+
+def test_optimize_keeps_canonical_over_isoform(monkeypatch):
+    monkeypatch.setenv('OPTIMIZER_WORKERS', '1')
+    dataset = DataSet(Project('JPST000123'), '1')
+    peptides = [Peptide(dataset, sequence) for sequence in ['PEPTIDEK', 'SAMPLER', 'TESTK']]
+    proteins = []
+    for uniprot_id, indices in [('Q00001-2', (0, 1)), ('Q00001', (0, 1)), ('Q00002', (1, 2)), ('Q00003-2', (2,))]:
+        protein = Protein(dataset, uniprot_id)
+        for index in indices:
+            protein.add_match(peptides[index], '1', str(len(peptides[index].get_sequence())))
+        proteins.append(protein)
+
+    assert [protein.get_uniprot() for protein in Protein.optimize(proteins)] == ['Q00001', 'Q00002']
+
+
+def test_reduce_dominated_proteins_and_essential_peptides():
+    # 'e' is only in P4 (essential), so P4 is forced and 'd' with it; P2 is then contained in P1
+    forced_ids, cover_sets = Protein.reduce_set_cover({
+        'P1': {'a', 'b', 'c'},
+        'P2': {'a', 'd'},
+        'P3': {'b', 'c'},
+        'P4': {'d', 'e'},
+        'P5': {'a', 'c', 'x'},
+        'P6': {'x', 'b'},
+    })
+    assert forced_ids == ['P4']
+    assert 'P2' not in cover_sets
+    assert 'P3' not in cover_sets
+    assert Protein.reduce_set_cover({'P1': {'a'}, 'P2': {'a'}}) == (['P1'], {})
+
+
+def test_reduce_dominated_peptides():
+    # 'a' is in every protein that has 'b', so covering 'b' covers 'a' and 'a' is dropped
+    forced_ids, cover_sets = Protein.reduce_set_cover({
+        'P1': {'a', 'b', 'c'},
+        'P2': {'a', 'b', 'd'},
+        'P3': {'a', 'c', 'd'},
+    })
+    assert forced_ids == []
+    assert cover_sets == {'P1': {'b', 'c'}, 'P2': {'b', 'd'}, 'P3': {'c', 'd'}}
@@ -0,0 +1,46 @@
+import io
+from pathlib import Path
+
+from rdf_converter.models.dataset import DataSet
+from rdf_converter.models.enzyme import Enzyme
+from rdf_converter.models.modification import Modification
+from rdf_converter.models.peptide import Peptide
+from rdf_converter.models.project import Project
+from rdf_converter.models.psm import Psm
+
+
+DATA_DIR = Path(__file__).parent / 'data'
+
+
+def create_modification(title: str, unimod: str, site: str) -> Modification:
+    modification = Modification()
+    modification.set_title(title)
+    modification.set_unimod(unimod)
+    modification.set_site(site)
+    return modification
+
+
+def test_psm_table_matches_object_output():
+    # psm_rows.ttl was written by the object-based Psm of the baseline tree from the same rows and enzyme
+    dataset = DataSet(Project('JPST000123'), '1')
+    enzyme = Enzyme(dataset)
+    enzyme.get_fixed_mods().append(create_modification('Carbamidomethyl (C)', '4', 'C'))
+    enzyme.get_variable_mods().extend([
+        create_modification('Phospho (T)', '21', 'T'),
+        create_modification('Oxidation (M)', '35', 'M'),
+        create_modification('Label:13C(6) (K)', '188', 'K'),
+    ])
+
+    Psm.counter = 0
+    peptides = Peptide.read_peptides(dataset, str(DATA_DIR / 'psm_rows.tsv'))
+    for number, peptide in enumerate(peptides):
+        peptide.set_id(f'PEP{number}')
+    psms = dataset.get_psm_table()
+    psms.get(0).set_representative(True)
+    psms.get(5).set_representative(True)
+
+    f = io.StringIO()
+    not_found = psms.to_ttl(f)
+    f.write(f'# not found: {not_found}\n')
+    Psm.save_modifications(f, psms)
+    assert f.getvalue() == (DATA_DIR / 'psm_rows.ttl').read_text()